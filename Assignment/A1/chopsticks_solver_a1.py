@@ -0,0 +1,144 @@
+"""
+A retrograde-analysis solver for chopsticks.
+
+Chopsticks has only 5 ** 4 * 2 positions, but its game graph has cycles,
+so plain minimax never finishes.  Instead, every position code (see
+ChopsticksState) is enumerated once and the results are worked backwards
+from the finished games: a position is won if some move leads to a lost
+position, lost if every move leads to a won position, and drawn if neither
+can ever be shown.
+"""
+import time
+from typing import Any, Callable
+from concrete_game_a1 import Chopsticks
+from concrete_state_a1 import ChopsticksState, SIZE
+from strategy_a1 import random_strategy
+
+DRAW = 0
+WIN = 1
+LOSS = 2
+
+# The game whose is_over decides which positions are finished
+_GAME = Chopsticks(True)
+
+
+def is_finished(state: ChopsticksState) -> bool:
+    """
+    Return whether either player has lost both hands in state, by
+    Chopsticks.is_over.
+    """
+    return _GAME.is_over(state)
+
+
+class ChopsticksSolution:
+    """
+    The value of every chopsticks position for the player to move.
+
+    labels - for each position code, WIN, LOSS or DRAW
+    distances - for each position code, the number of moves until the game
+                ends with best play (0 for drawn positions)
+    seconds - how long solving took
+    """
+    labels: bytearray
+    distances: bytearray
+    seconds: float
+
+    def __init__(self) -> None:
+        """
+        Solve every chopsticks position.
+
+        >>> s = ChopsticksSolution()
+        >>> s.labels[312] == DRAW
+        True
+        """
+        start = time.perf_counter()
+        children = [[] for _ in range(SIZE)]
+        parents = [[] for _ in range(SIZE)]
+        for code in range(SIZE):
+            state = ChopsticksState.from_code(code)
+            if not is_finished(state):
+                for move in state.get_possible_moves():
+                    child = state.make_move(move).code
+                    children[code].append((move, child))
+                    parents[child].append(code)
+        self.labels = bytearray(SIZE)
+        self.distances = bytearray(SIZE)
+        unresolved = [len(c) for c in children]
+        queue = [code for code in range(SIZE) if not children[code]]
+        for code in queue:
+            self.labels[code] = LOSS
+        # Positions are queued in order of distance, so each label is set
+        # by the quickest win or the slowest loss.
+        for code in queue:
+            for parent in parents[code]:
+                if self.labels[parent] != DRAW:
+                    continue
+                if self.labels[code] == LOSS:
+                    self.labels[parent] = WIN
+                else:
+                    unresolved[parent] -= 1
+                    if unresolved[parent] > 0:
+                        continue
+                    self.labels[parent] = LOSS
+                self.distances[parent] = self.distances[code] + 1
+                queue.append(parent)
+        self._children = children
+        self.seconds = time.perf_counter() - start
+
+    def best_move(self, state: ChopsticksState) -> Any:
+        """
+        Return the best move for the player to move in state: the quickest
+        win, else a move that keeps the draw, else the slowest loss.
+
+        >>> s = ChopsticksSolution()
+        >>> c = ChopsticksState(True)
+        >>> c.state = [1, 0, 0, 4]
+        >>> s.best_move(c)
+        'lr'
+        """
+        best = None
+        best_rank = None
+        for move, child in self._children[state.code]:
+            if self.labels[child] == LOSS:
+                rank = (0, self.distances[child])
+            elif self.labels[child] == DRAW:
+                rank = (1, 0)
+            else:
+                rank = (2, -self.distances[child])
+            if best_rank is None or rank < best_rank:
+                best, best_rank = move, rank
+        return best
+
+
+_SOLUTION = []
+
+
+def get_solution() -> ChopsticksSolution:
+    """
+    Return the chopsticks solution, solving the game the first time.
+    """
+    if not _SOLUTION:
+        _SOLUTION.append(ChopsticksSolution())
+    return _SOLUTION[0]
+
+
+def perfect_strategy(game: Any,
+                     fallback: Callable = random_strategy) -> Any:
+    """
+    Return the best move for a game of chopsticks, by table lookup, or the
+    move of fallback for any other game.
+    """
+    if not isinstance(game.current_state, ChopsticksState):
+        return fallback(game)
+    return get_solution().best_move(game.current_state)
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
+    solution = ChopsticksSolution()
+    print("Solved {} positions in {:.3f} seconds: {} won, {} lost, "
+          "{} drawn.".format(SIZE, solution.seconds,
+                             solution.labels.count(WIN),
+                             solution.labels.count(LOSS),
+                             solution.labels.count(DRAW)))
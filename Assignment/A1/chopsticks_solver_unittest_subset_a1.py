@@ -0,0 +1,76 @@
+import unittest
+from unittest.mock import patch
+
+from concrete_game_a1 import SubtractSquare
+from concrete_state_a1 import ChopsticksState, SIZE
+from chopsticks_solver_a1 import ChopsticksSolution, WIN, LOSS, DRAW, \
+    is_finished, perfect_strategy
+
+
+class ChopsticksSolverUnitTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.solution = ChopsticksSolution()
+
+    def children(self, state):
+        return [state.make_move(move) for move in state.get_possible_moves()]
+
+    def test_code_round_trip(self):
+        for code in range(SIZE):
+            state = ChopsticksState.from_code(code)
+            copy = ChopsticksState(state.player == "p1")
+            copy.state = state.state
+            self.assertEqual(copy, state)
+            self.assertEqual(hash(copy), hash(state))
+
+    def test_finished_positions_lost(self):
+        for code in range(SIZE):
+            if is_finished(ChopsticksState.from_code(code)):
+                self.assertEqual(self.solution.labels[code], LOSS)
+                self.assertEqual(self.solution.distances[code], 0)
+
+    def test_labels_consistent(self):
+        for code in range(SIZE):
+            state = ChopsticksState.from_code(code)
+            if is_finished(state):
+                continue
+            labels = [self.solution.labels[child.code]
+                      for child in self.children(state)]
+            if self.solution.labels[code] == WIN:
+                self.assertIn(LOSS, labels)
+            elif self.solution.labels[code] == LOSS:
+                self.assertTrue(all(label == WIN for label in labels))
+            else:
+                self.assertNotIn(LOSS, labels)
+                self.assertIn(DRAW, labels)
+
+    def test_best_move_keeps_value(self):
+        for code in range(SIZE):
+            state = ChopsticksState.from_code(code)
+            if is_finished(state):
+                continue
+            move = self.solution.best_move(state)
+            self.assertIn(move, state.get_possible_moves())
+            child = state.make_move(move).code
+            label = self.solution.labels[code]
+            if label == WIN:
+                self.assertEqual(self.solution.labels[child], LOSS)
+                self.assertEqual(self.solution.distances[child] + 1,
+                                 self.solution.distances[code])
+            elif label == DRAW:
+                self.assertEqual(self.solution.labels[child], DRAW)
+
+    def test_start_is_draw(self):
+        start = ChopsticksState(True)
+        self.assertEqual(self.solution.labels[start.code], DRAW)
+
+    def test_other_games_fall_back(self):
+        with patch('builtins.input', return_value='20'):
+            game = SubtractSquare(True)
+        move = perfect_strategy(game, lambda g: 4)
+        self.assertEqual(move, 4)
+        self.assertIsNotNone(perfect_strategy(game))
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -5,10 +5,63 @@ from typing import Any
 from current_state_a1 import CurrentState
 
 
+# Each hand holds 0 to 4 fingers; a position is packed into one integer as
+# ((((p1 left * 5 + p1 right) * 5 + p2 left) * 5 + p2 right) * 2 + turn),
+# where turn is 0 when it is p1's turn and 1 when it is p2's.
+MOVES = ["ll", "lr", "rl", "rr"]
+SIZE = 5 ** 4 * 2
+
+
+def _build_tables() -> tuple:
+    """
+    Return the hands, the possible moves and the position reached by each
+    of the four moves, for every position code.
+    """
+    hands = []
+    possible = []
+    transitions = []
+    for code in range(SIZE):
+        rest, turn = divmod(code, 2)
+        h = []
+        for _ in range(4):
+            rest, hand = divmod(rest, 5)
+            h.insert(0, hand)
+        # The attacking player's hands, then the defending player's
+        mine, theirs = (0, 2) if turn == 0 else (2, 0)
+        moves = []
+        children = []
+        for move in MOVES:
+            attack = mine + (0 if move[0] == "l" else 1)
+            target = theirs + (0 if move[1] == "l" else 1)
+            if h[attack] != 0 and h[target] != 0:
+                moves.append(move)
+            new = h[:]
+            new[target] = (h[target] + h[attack]) % 5
+            child = 0
+            for hand in new:
+                child = child * 5 + hand
+            children.append(child * 2 + 1 - turn)
+        hands.append(tuple(h))
+        possible.append(tuple(moves))
+        transitions.append(tuple(children))
+    return tuple(hands), tuple(possible), tuple(transitions)
+
+
+_HANDS, _POSSIBLE, _TRANSITIONS = _build_tables()
+_MOVE_INDEX = {move: i for i, move in enumerate(MOVES)}
+
+
 class ChopsticksState(CurrentState):
     """
     A state recorder of the chopsticks game.
+
+    The whole position is packed into the integer code, so states are small,
+    hashable, and make_move is a table lookup.
+
+    code - the position code of this state, from 0 to SIZE - 1
     """
+    __slots__ = ("code",)
+    code: int
 
     def __init__(self, is_p1_turn: bool) -> None:
         """
@@ -19,10 +72,65 @@ class ChopsticksState(CurrentState):
         'p1'
         >>> c.state
         [1, 1, 1, 1]
+        >>> c.code
+        312
         """
 
+        self.code = 312
         super().__init__(is_p1_turn)
-        self.state = [1, 1, 1, 1]
+
+    @classmethod
+    def from_code(cls, code: int) -> 'ChopsticksState':
+        """
+        Return the chopsticks state with position code code.
+
+        >>> str(ChopsticksState.from_code(313))
+        'Player 1: 1 - 1, Player 2: 1 - 1'
+        """
+
+        s = cls.__new__(cls)
+        s.code = code
+        return s
+
+    @property
+    def state(self) -> list:
+        """
+        The fingers on p1's left and right hands, then p2's.
+        """
+
+        return list(_HANDS[self.code])
+
+    @state.setter
+    def state(self, hands: list) -> None:
+        """
+        Set the fingers on each hand to hands.
+
+        >>> c = ChopsticksState(False)
+        >>> c.state = [0, 4, 2, 1]
+        >>> c.code
+        57
+        """
+
+        code = 0
+        for hand in hands:
+            code = code * 5 + hand
+        self.code = code * 2 + self.code % 2
+
+    @property
+    def player(self) -> str:
+        """
+        The player whose turn it is, "p1" or "p2".
+        """
+
+        return "p1" if self.code % 2 == 0 else "p2"
+
+    @player.setter
+    def player(self, player: str) -> None:
+        """
+        Set the player whose turn it is to player.
+        """
+
+        self.code = self.code - self.code % 2 + (0 if player == "p1" else 1)
 
     def __str__(self) -> str:
         """
@@ -34,16 +142,24 @@ class ChopsticksState(CurrentState):
         """
 
         return "Player 1: {} - {}, " \
-               "Player 2: {} - {}".format(self.state[0], self.state[1],
-                                          self.state[2], self.state[3])
+               "Player 2: {} - {}".format(*_HANDS[self.code])
 
     def __eq__(self, other: Any) -> bool:
         """
         Return true if two same games have the same state.
         """
 
-        return (type(self) == type(other) and self.state == other.state
-                and self.player == other.player)
+        return type(self) == type(other) and self.code == other.code
+
+    def __hash__(self) -> int:
+        """
+        Return a hash of this state, consistent with __eq__.
+
+        >>> len({ChopsticksState(True), ChopsticksState(True)})
+        1
+        """
+
+        return hash(self.code)
 
     def get_current_player_name(self) -> str:
         """
@@ -65,31 +181,7 @@ class ChopsticksState(CurrentState):
         ['ll', 'lr', 'rl', 'rr']
         """
 
-        a = []
-        if self.player == "p1":
-            if self.state[0] != 0:
-                if self.state[2] != 0:
-                    a.append("ll")
-                if self.state[3] != 0:
-                    a.append("lr")
-            if self.state[1] != 0:
-                if self.state[2] != 0:
-                    a.append("rl")
-                if self.state[3] != 0:
-                    a.append("rr")
-        elif self.player == "p2":
-            if self.state[2] != 0:
-                if self.state[0] != 0:
-                    a.append("ll")
-                if self.state[1] != 0:
-                    a.append("lr")
-            if self.state[3] != 0:
-                if self.state[0] != 0:
-                    a.append("rl")
-                if self.state[1] != 0:
-                    a.append("rr")
-
-        return a
+        return list(_POSSIBLE[self.code])
 
     def is_valid_move(self, move: str) -> bool:
         """
@@ -100,69 +192,23 @@ class ChopsticksState(CurrentState):
         True
         """
 
-        if move in ["ll", "lr", "rl", "rr"]:
-            if self.player == "p1":
-                if move[0] == "l":
-                    return self.state[0] != 0
-                elif move[0] == "r":
-                    return self.state[1] != 0
-            elif self.player == "p2":
-                if move[0] == "l":
-                    return self.state[2] != 0
-                elif move[0] == "r":
-                    return self.state[3] != 0
+        if move in _MOVE_INDEX:
+            hand = (0 if self.code % 2 == 0 else 2) + \
+                (0 if move[0] == "l" else 1)
+            return _HANDS[self.code][hand] != 0
         return False
 
     def make_move(self, move: str) -> Any:
         """
         Make a movement for the game.
-        """
 
-        if self.player == "p1":
-            s = ChopsticksState(False)
-            if move == "ll":
-                num = self.state[0] + self.state[2]
-                if num >= 5:
-                    num -= 5
-                s.state = [self.state[0], self.state[1], num, self.state[3]]
-            elif move == "rl":
-                num = self.state[1] + self.state[2]
-                if num >= 5:
-                    num -= 5
-                s.state = [self.state[0], self.state[1], num, self.state[3]]
-            elif move == "lr":
-                num = self.state[0] + self.state[3]
-                if num >= 5:
-                    num -= 5
-                s.state = [self.state[0], self.state[1], self.state[2], num]
-            elif move == "rr":
-                num = self.state[1] + self.state[3]
-                if num >= 5:
-                    num -= 5
-                s.state = [self.state[0], self.state[1], self.state[2], num]
-        else:
-            s = ChopsticksState(True)
-            if move == "ll":
-                num = self.state[2] + self.state[0]
-                if num >= 5:
-                    num -= 5
-                s.state = [num, self.state[1], self.state[2], self.state[3]]
-            elif move == "rl":
-                num = self.state[3] + self.state[0]
-                if num >= 5:
-                    num -= 5
-                s.state = [num, self.state[1], self.state[2], self.state[3]]
-            elif move == "lr":
-                num = self.state[2] + self.state[1]
-                if num >= 5:
-                    num -= 5
-                s.state = [self.state[0], num, self.state[2], self.state[3]]
-            elif move == "rr":
-                num = self.state[3] + self.state[1]
-                if num >= 5:
-                    num -= 5
-                s.state = [self.state[0], num, self.state[2], self.state[3]]
+        >>> c = ChopsticksState(True).make_move("rl")
+        >>> c.player, c.state
+        ('p2', [1, 1, 2, 1])
+        """
 
+        s = ChopsticksState.__new__(ChopsticksState)
+        s.code = _TRANSITIONS[self.code][_MOVE_INDEX[move]]
         return s
 
 
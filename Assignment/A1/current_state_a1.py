@@ -8,6 +8,7 @@ class CurrentState:
     """
     A class about the current state of the game.
     """
+    __slots__ = ()
 
     def __init__(self, is_p1_turn: bool) -> None:
         """
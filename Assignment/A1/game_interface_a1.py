@@ -3,6 +3,7 @@ from concrete_game_a1 import Chopsticks, SubtractSquare
 from current_state_a1 import CurrentState
 from concrete_state_a1 import ChopsticksState, SubtractSquareState
 from strategy_a1 import *
+from chopsticks_solver_a1 import perfect_strategy
 from typing import Any, Callable
 
 # 's' should map to your implementation of Subtract Square, and 'c' should map
@@ -13,7 +14,8 @@ playable_games = {'s': SubtractSquare,
 # The strategies you are to implement.  See strategy_a1.py, and then decide
 # how to modify this.
 usable_strategies = {'r': random_strategy,
-                     'i': interactive_strategy}
+                     'i': interactive_strategy,
+                     'p': perfect_strategy}
 
 
 class GameInterface:
@@ -0,0 +1,541 @@
+"""
+Benchmarks for the A2 games and strategies.
+
+Run "python benchmark.py" to run every benchmark, or
+"python benchmark.py name ..." to run only the named ones (see benchmarks).
+
+NOTE: You do not have to run python-ta on this file.
+"""
+import copy
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from functools import partial
+from typing import Any, Callable
+from strategy import minimax_recursive_strategy, minimax_iterative_strategy, \
+    alphabeta_recursive_strategy, alphabeta_iterative_strategy, \
+    rough_outcome_strategy, minimax_iterative_reuse_strategy, SHARED_TREE, \
+    minimax_lean_strategy, alphabeta_ordered_recursive_strategy, \
+    iterative_deepening_strategy
+from game_state import GameState, supports_apply
+from subtract_square_game import SubtractSquareGame
+from match_runner import make_game, play_game, run_matches
+from mcts import MonteCarloSearch, mcts_strategy
+from move_ordering import MoveOrdering, capture_priority
+from stonehenge import StonehengeGame, StonehengeState
+from stonehenge_book import OpeningBook, opening_book_strategy
+from stonehenge_playout import PlayoutKernel
+from transposition_table import TranspositionTable, canonical_key, \
+    state_key
+
+
+def stonehenge_after(length: int, moves: list) -> StonehengeGame:
+    """
+    Return a stonehenge game of side length length with moves already played.
+    """
+    game = make_game(StonehengeGame, True, str(length))
+    for move in moves:
+        game.current_state = game.current_state.make_move(move)
+    return game
+
+
+@contextmanager
+def count_calls(cls: type, name: str) -> Any:
+    """
+    Count the calls to method name of cls (and its subclasses) made inside
+    the with block.  The count is available as counter[0].
+    """
+    counter = [0]
+    original = getattr(cls, name)
+
+    def counted(*args: Any, **kwargs: Any) -> Any:
+        counter[0] += 1
+        return original(*args, **kwargs)
+
+    setattr(cls, name, counted)
+    try:
+        yield counter
+    finally:
+        setattr(cls, name, original)
+
+
+def nodes_expanded(strategy: Callable, game: Any) -> tuple:
+    """
+    Return the move strategy picks for game, the number of nodes it
+    expanded (calls to make_move and apply_move) and the seconds it took.
+    """
+    cls = type(game.current_state)
+    applying = count_calls(cls, "apply_move")
+    if not supports_apply(game.current_state):
+        applying = nullcontext([0])
+    with count_calls(cls, "make_move") as made, applying as applied:
+        start = time.perf_counter()
+        move = strategy(game)
+        elapsed = time.perf_counter() - start
+    return move, made[0] + applied[0], elapsed
+
+
+def bench_alphabeta() -> None:
+    """
+    Report the nodes expanded by plain minimax and by alpha-beta on the
+    same positions.
+    """
+    positions = [("SubtractSquare 20", make_game(SubtractSquareGame, True,
+                                                 "20")),
+                 ("SubtractSquare 30", make_game(SubtractSquareGame, True,
+                                                 "30")),
+                 ("Stonehenge 2", stonehenge_after(2, [])),
+                 ("Stonehenge 3 +4", stonehenge_after(3, ["A", "F", "L",
+                                                          "D"]))]
+    pairs = [(minimax_recursive_strategy, alphabeta_recursive_strategy),
+             (minimax_iterative_strategy, alphabeta_iterative_strategy)]
+    print("{:<18} {:<28} {:>5} {:>10} {:>9}".format(
+        "position", "strategy", "move", "nodes", "seconds"))
+    for name, game in positions:
+        for pair in pairs:
+            for strategy in pair:
+                move, nodes, elapsed = nodes_expanded(strategy, game)
+                print("{:<18} {:<28} {:>5} {:>10} {:>9.3f}".format(
+                    name, strategy.__name__, move, nodes, elapsed))
+
+
+def bench_ordering() -> None:
+    """
+    Report the nodes expanded by both alpha-beta strategies with each move
+    ordering heuristic, alone and combined.
+    """
+    positions = [("SubtractSquare 30", make_game(SubtractSquareGame, True,
+                                                 "30")),
+                 ("SubtractSquare 40", make_game(SubtractSquareGame, True,
+                                                 "40")),
+                 ("Stonehenge 2", stonehenge_after(2, [])),
+                 ("Stonehenge 3 +2", stonehenge_after(3, ["A", "F"])),
+                 ("Stonehenge 3", stonehenge_after(3, []))]
+    orderings = [("none", lambda: None),
+                 ("captures", lambda: MoveOrdering(capture_priority, False,
+                                                   False)),
+                 ("killers", lambda: MoveOrdering(None, True, False)),
+                 ("history", lambda: MoveOrdering(None, False, True)),
+                 ("all", lambda: MoveOrdering(capture_priority))]
+    print("{:<18} {:<10} {:>5} {:>10} {:>10} {:>9}".format(
+        "position", "ordering", "move", "recursive", "iterative",
+        "seconds"))
+    for name, game in positions:
+        for label, make in orderings:
+            move, nodes, elapsed = nodes_expanded(
+                lambda g: alphabeta_recursive_strategy(g, make()), game)
+            _, stack_nodes, _ = nodes_expanded(
+                lambda g: alphabeta_iterative_strategy(g, make()), game)
+            print("{:<18} {:<10} {:>5} {:>10} {:>10} {:>9.3f}".format(
+                name, label, move, nodes, stack_nodes, elapsed))
+
+
+def reference_make_move(state: StonehengeState,
+                        move: Any) -> StonehengeState:
+    """
+    Return the state after move the way StonehengeState.make_move built it
+    before the board geometry was shared: deep-copy the nested [r, dl, dr]
+    ley-lines, claim the cell in each ley-line through it, and rebuild the
+    state from them through the length -1 constructor.
+
+    This is the "before" path of bench_make_move.
+
+    >>> s = StonehengeState(True, 2)
+    >>> reference_make_move(s, 'A') == s.make_move('A')
+    True
+    """
+    p = "1" if state.p1_turn else "2"
+    nested = copy.deepcopy(state.state)
+    flat = [line for kind in nested for line in kind]
+    board = state.board
+    i = board.index[move]
+    for n in board.cell_lines[i]:
+        line = flat[n]
+        line[board.lines[n].index(i) + 1] = p
+        if line[0] == "@" and line[1:].count(p) * 2 >= len(line) - 1:
+            line[0] = p
+    return StonehengeState(not state.p1_turn, -1, *nested)
+
+
+def _time_moves(make_move: Callable, state: StonehengeState,
+                moves: list) -> tuple:
+    """
+    Return the microseconds, allocated blocks and allocated bytes per move
+    of make_move(state, move) over moves.
+    """
+    repeat = 2000 // len(moves) + 1
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for move in moves:
+            make_move(state, move)
+    elapsed = (time.perf_counter() - start) / (repeat * len(moves))
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    children = [make_move(state, move) for move in moves]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    blocks = sum(stat.count_diff for stat in stats)
+    size = sum(stat.size_diff for stat in stats)
+    del children
+    return elapsed * 1e6, blocks / len(moves), size / len(moves)
+
+
+def bench_make_move() -> None:
+    """
+    Report the time and memory allocated per StonehengeState.make_move on
+    the empty board of each side length, next to those of
+    reference_make_move, the deep-copying path it replaced.
+    """
+    print("{:>6} {:>8} {:>12} {:>14} {:>14}".format(
+        "length", "path", "us/move", "blocks/move", "bytes/move"))
+    paths = [("before", reference_make_move),
+             ("current", StonehengeState.make_move)]
+    for length in range(1, 9):
+        state = StonehengeState(True, length)
+        moves = state.get_possible_moves()
+        for name, make_move in paths:
+            print("{:>6} {:>8} {:>12.2f} {:>14.1f} {:>14.1f}".format(
+                length, name, *_time_moves(make_move, state, moves)))
+
+
+def bench_rough_outcome() -> None:
+    """
+    Report the time rough_outcome_strategy takes on the empty board of each
+    side length.
+    """
+    print("{:>6} {:>5} {:>12}".format("length", "move", "ms/call"))
+    for length in range(1, 9):
+        game = stonehenge_after(length, [])
+        repeat = 20
+        start = time.perf_counter()
+        for _ in range(repeat):
+            move = rough_outcome_strategy(game)
+        elapsed = (time.perf_counter() - start) / repeat
+        print("{:>6} {:>5} {:>12.3f}".format(length, move, elapsed * 1e3))
+
+
+def bench_memory() -> None:
+    """
+    Report the peak memory allocated by iterative minimax with a full tree
+    and with only the current path kept.
+    """
+    positions = [("Stonehenge 2", stonehenge_after(2, [])),
+                 ("Stonehenge 3 +4", stonehenge_after(3, ["A", "F", "L",
+                                                          "D"]))]
+    print("{:<18} {:<28} {:>5} {:>12} {:>9}".format(
+        "position", "strategy", "move", "peak KiB", "seconds"))
+    for name, game in positions:
+        for strategy in [minimax_iterative_strategy, minimax_lean_strategy]:
+            tracemalloc.start()
+            start = time.perf_counter()
+            move = strategy(game)
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print("{:<18} {:<28} {:>5} {:>12.1f} {:>9.3f}".format(
+                name, strategy.__name__, move, peak / 1024, elapsed))
+
+
+def bench_symmetry() -> None:
+    """
+    Report the number of distinct stonehenge positions at each depth from
+    the empty board, with and without identifying symmetric positions, and
+    the nodes expanded by recursive minimax with a table keyed each way.
+    """
+    print("{:>6} {:>5} {:>10} {:>10} {:>7}".format(
+        "length", "depth", "positions", "canonical", "ratio"))
+    for length, depths in [(2, 7), (3, 6), (4, 4)]:
+        layer = {StonehengeState(True, length).__getstate__():
+                 StonehengeState(True, length)}
+        for depth in range(depths + 1):
+            canonical = {state.canonical_key() for state in layer.values()}
+            print("{:>6} {:>5} {:>10} {:>10} {:>7.2f}".format(
+                length, depth, len(layer), len(canonical),
+                len(layer) / len(canonical)))
+            layer = {child.__getstate__(): child for state in layer.values()
+                     for child in [state.make_move(move) for move in
+                                   state.get_possible_moves()]}
+            if not layer:
+                break
+    print("{:<18} {:<10} {:>5} {:>10} {:>9}".format(
+        "position", "key", "move", "nodes", "seconds"))
+    for name, game in [("Stonehenge 2", stonehenge_after(2, [])),
+                       ("Stonehenge 3 +4", stonehenge_after(3, ["A", "F", "L",
+                                                                "D"]))]:
+        for label, key in [("repr", repr), ("canonical", canonical_key)]:
+            table = TranspositionTable(key=key)
+            move, nodes, elapsed = nodes_expanded(
+                lambda g: minimax_recursive_strategy(g, table), game)
+            print("{:<18} {:<10} {:>5} {:>10} {:>9.3f}".format(
+                name, label, move, nodes, elapsed))
+
+
+def bench_keys() -> None:
+    """
+    Report the time to compute a table key for a stonehenge state with repr
+    and with its Zobrist hash, and the time cached minimax takes with each.
+    """
+    print("{:>6} {:>12} {:>12}".format("length", "repr us", "hash us"))
+    for length in range(1, 9):
+        state = stonehenge_after(length, ["A", "C"]).current_state
+        repeat = 2000
+        times = []
+        for key in [repr, lambda s: hash(state_key(s))]:
+            start = time.perf_counter()
+            for _ in range(repeat):
+                key(state)
+            times.append((time.perf_counter() - start) / repeat)
+        print("{:>6} {:>12.2f} {:>12.2f}".format(
+            length, times[0] * 1e6, times[1] * 1e6))
+    print("{:<18} {:<6} {:>5} {:>10} {:>9}".format(
+        "position", "key", "move", "nodes", "seconds"))
+    for name, game in [("Stonehenge 2", stonehenge_after(2, [])),
+                       ("Stonehenge 3 +4", stonehenge_after(3, ["A", "F", "L",
+                                                                "D"]))]:
+        for label, key in [("repr", repr), ("state", state_key)]:
+            table = TranspositionTable(key=key)
+            move, nodes, elapsed = nodes_expanded(
+                lambda g: minimax_recursive_strategy(g, table), game)
+            print("{:<18} {:<6} {:>5} {:>10} {:>9.3f}".format(
+                name, label, move, nodes, elapsed))
+
+
+def bench_render() -> None:
+    """
+    Report how many stonehenge states per second str and repr render, on a
+    batch of random positions of each side length.
+    """
+    rng = random.Random(148)
+    print("{:>6} {:>8} {:>12} {:>12}".format(
+        "length", "states", "str/s", "repr/s"))
+    for length in range(1, 9):
+        states = []
+        for _ in range(2000):
+            state = StonehengeState(rng.random() < 0.5, length)
+            for _ in range(rng.randrange(len(state.get_possible_moves()))):
+                if state.get_possible_moves() == []:
+                    break
+                state = state.make_move(rng.choice(state.get_possible_moves()))
+            states.append(state)
+        rates = []
+        for render in [str, repr]:
+            start = time.perf_counter()
+            for state in states:
+                render(state)
+            rates.append(len(states) / (time.perf_counter() - start))
+        print("{:>6} {:>8} {:>12.0f} {:>12.0f}".format(
+            length, len(states), rates[0], rates[1]))
+
+
+def bench_reuse() -> None:
+    """
+    Report the seconds each move of a self-play game of stonehenge takes
+    with iterative minimax, with and without keeping its tree between moves.
+    """
+    for strategy in [minimax_iterative_strategy,
+                     minimax_iterative_reuse_strategy]:
+        SHARED_TREE.keep(None)
+        result = play_game(StonehengeGame, "2", strategy, strategy)
+        print("{:<34} {}".format(strategy.__name__, " ".join(
+            "{:.4f}".format(latency) for latency in result["latencies"])))
+
+
+def bench_mcts() -> None:
+    """
+    Report the win rate of mcts_strategy against rough_outcome_strategy on
+    stonehenge of sides 4 and 5, for several seconds of thinking per move,
+    with each strategy starting half of the games.
+    """
+    games = 20
+    print("{:>6} {:>8} {:>9} {:>10} {:>12}".format(
+        "length", "seconds", "win rate", "tie rate", "playouts/s"))
+    for length in [4, 5]:
+        for budget in [0.001, 0.003, 0.01, 0.1]:
+            search = MonteCarloSearch(budget=budget)
+            game = stonehenge_after(length, [])
+            root = search.search(game)
+            rate = root.visits / budget
+            strategy = partial(mcts_strategy, search=search)
+            summary = run_matches(StonehengeGame, str(length), strategy,
+                                  rough_outcome_strategy, games // 2,
+                                  os.cpu_count())
+            second = run_matches(StonehengeGame, str(length),
+                                 rough_outcome_strategy, strategy,
+                                 games // 2, os.cpu_count())
+            wins = (summary["p1_win_rate"] + second["p2_win_rate"]) / 2
+            ties = (summary["tie_rate"] + second["tie_rate"]) / 2
+            print("{:>6} {:>8} {:>9.2f} {:>10.2f} {:>12.0f}".format(
+                length, budget, wins, ties, rate))
+
+
+def bench_playout() -> None:
+    """
+    Report how many random stonehenge games per second are played to the
+    end from the empty board with make_move and with a PlayoutKernel, and
+    how many playouts per second a MonteCarloSearch runs with each.
+    """
+    print("{:>6} {:>12} {:>12} {:>12} {:>12}".format(
+        "length", "make_move/s", "kernel/s", "mcts/s", "mcts+kern/s"))
+    for length in range(1, 6):
+        game = stonehenge_after(length, [])
+        state = game.current_state
+        rng = random.Random(0)
+        repeat = 2000
+        start = time.perf_counter()
+        for _ in range(repeat):
+            s = state
+            while not game.is_over(s):
+                s = s.make_move(rng.choice(s.get_possible_moves()))
+        slow = repeat / (time.perf_counter() - start)
+        kernel = PlayoutKernel(length, seed=0)
+        kernel.load(state)
+        repeat = 100000
+        start = time.perf_counter()
+        for _ in range(repeat):
+            kernel.playout()
+        fast = repeat / (time.perf_counter() - start)
+        rates = []
+        for playout in [None, kernel.winner]:
+            search = MonteCarloSearch(budget=0.5, seed=0, playout=playout)
+            rates.append(search.search(game).visits / 0.5)
+        print("{:>6} {:>12.0f} {:>12.0f} {:>12.0f} {:>12.0f}".format(
+            length, slow, fast, rates[0], rates[1]))
+
+
+def bench_apply() -> None:
+    """
+    Report the best of three seconds recursive minimax and alpha-beta take
+    when they search with apply_move and undo_move, and when they have to
+    make a new state with make_move at every node instead.
+    """
+    positions = [("Subtract 30", make_game(SubtractSquareGame, True, "30")),
+                 ("Stonehenge 2", stonehenge_after(2, [])),
+                 ("Stonehenge 3 +4", stonehenge_after(3, ["A", "F", "L",
+                                                         "D"]))]
+
+    def best_time(strategy: Callable, game: Any) -> float:
+        times = []
+        for _ in range(3):
+            start = time.perf_counter()
+            strategy(game)
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    print("{:<16} {:<30} {:>10} {:>10} {:>8}".format(
+        "position", "strategy", "make_move", "apply", "speedup"))
+    for name, game in positions:
+        cls = type(game.current_state)
+        for strategy in [minimax_recursive_strategy,
+                         alphabeta_recursive_strategy]:
+            in_place = best_time(strategy, game)
+            # Hide apply_move, so that supports_apply is False
+            original = cls.apply_move
+            cls.apply_move = GameState.apply_move
+            try:
+                copied = best_time(strategy, game)
+            finally:
+                cls.apply_move = original
+            print("{:<16} {:<30} {:>10.4f} {:>10.4f} {:>8.2f}".format(
+                name, strategy.__name__, copied, in_place,
+                copied / in_place))
+
+
+def bench_batch() -> None:
+    """
+    Report how many random stonehenge positions per second get their
+    rough_outcome() one at a time, and with stonehenge_batch (with and
+    without encoding the states first).
+    """
+    try:
+        from stonehenge_batch import get_tables, encode, rough_outcomes
+    except ImportError:
+        print("stonehenge_batch needs NumPy, which is not installed")
+        return
+    rng = random.Random(0)
+    print("{:>6} {:>8} {:>12} {:>12} {:>12}".format(
+        "length", "states", "one/s", "batch/s", "encoded/s"))
+    for length in range(1, 6):
+        states = []
+        for _ in range(10000):
+            state = StonehengeState(True, length)
+            for _ in range(rng.randrange(len(state.cells))):
+                if state.get_possible_moves() == []:
+                    break
+                state = state.make_move(rng.choice(
+                    state.get_possible_moves()))
+            states.append(state)
+        tables = get_tables(length)
+        start = time.perf_counter()
+        for state in states:
+            state.rough_outcome()
+        one = len(states) / (time.perf_counter() - start)
+        start = time.perf_counter()
+        arrays = encode(states)
+        middle = time.perf_counter()
+        rough_outcomes(tables, *arrays)
+        end = time.perf_counter()
+        print("{:>6} {:>8} {:>12.0f} {:>12.0f} {:>12.0f}".format(
+            length, len(states), one, len(states) / (end - start),
+            len(states) / (end - middle)))
+
+
+def bench_book() -> None:
+    """
+    Report the seconds to build, save and load a side 3 opening book, and
+    the seconds the first move of a game takes from the book and by search.
+    """
+    start = time.perf_counter()
+    book = OpeningBook.build(3, 3)
+    built = time.perf_counter() - start
+    with tempfile.TemporaryDirectory() as directory:
+        path = directory + "/book.bin"
+        book.save(path)
+        start = time.perf_counter()
+        book = OpeningBook.load(path)
+        loaded = time.perf_counter() - start
+        print("{} positions, built in {:.2f} s, loaded in {:.1f} us".format(
+            len(book), built, loaded * 1e6))
+        print("{:<12} {:<38} {:>5} {:>12}".format(
+            "position", "strategy", "move", "us"))
+        for name, game in [("empty", stonehenge_after(3, [])),
+                           ("after A B", stonehenge_after(3, ["A", "B"]))]:
+            for label, strategy in [
+                    ("opening_book_strategy",
+                     lambda g: opening_book_strategy(g, book)),
+                    ("alphabeta_ordered_recursive_strategy",
+                     alphabeta_ordered_recursive_strategy),
+                    ("iterative_deepening_strategy",
+                     iterative_deepening_strategy)]:
+                start = time.perf_counter()
+                move = strategy(game)
+                elapsed = time.perf_counter() - start
+                print("{:<12} {:<38} {:>5} {:>12.1f}".format(
+                    name, label, move, elapsed * 1e6))
+
+
+benchmarks = {'alphabeta': bench_alphabeta,
+              'apply': bench_apply,
+              'batch': bench_batch,
+              'book': bench_book,
+              'keys': bench_keys,
+              'make_move': bench_make_move,
+              'mcts': bench_mcts,
+              'memory': bench_memory,
+              'ordering': bench_ordering,
+              'playout': bench_playout,
+              'render': bench_render,
+              'reuse': bench_reuse,
+              'rough_outcome': bench_rough_outcome,
+              'symmetry': bench_symmetry}
+
+
+if __name__ == "__main__":
+    for chosen in sys.argv[1:] or list(benchmarks):
+        print("== {} ==".format(chosen))
+        benchmarks[chosen]()
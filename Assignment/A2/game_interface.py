@@ -12,14 +12,33 @@ from strategy import *
 from typing import Any, Callable
 from subtract_square_game import SubtractSquareGame
 from stonehenge import StonehengeGame
+from stonehenge_bitboard import StonehengeBitboardGame
+from subtract_square_db import endgame_strategy
+from mcts import mcts_strategy, mcts_parallel_strategy
+from stonehenge_book import opening_book_strategy
 
 playable_games = {'s': SubtractSquareGame,
-                  'h': StonehengeGame}
+                  'h': StonehengeGame,
+                  'hb': StonehengeBitboardGame}
 
 usable_strategies = {'i': interactive_strategy,
                      'ro': rough_outcome_strategy,
                      'mr': minimax_recursive_strategy,
-                     'mi': minimax_iterative_strategy}
+                     'mi': minimax_iterative_strategy,
+                     'mrc': minimax_recursive_cached_strategy,
+                     'mic': minimax_iterative_cached_strategy,
+                     'mit': minimax_iterative_reuse_strategy,
+                     'ml': minimax_lean_strategy,
+                     'ar': alphabeta_recursive_strategy,
+                     'ai': alphabeta_iterative_strategy,
+                     'aro': alphabeta_ordered_recursive_strategy,
+                     'aio': alphabeta_ordered_iterative_strategy,
+                     'mp': minimax_parallel_strategy,
+                     'id': iterative_deepening_strategy,
+                     'mc': mcts_strategy,
+                     'mcp': mcts_parallel_strategy,
+                     'b': opening_book_strategy,
+                     'e': endgame_strategy}
 
 
 class GameInterface:
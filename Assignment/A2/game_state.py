@@ -55,6 +55,23 @@ class GameState:
         """
         raise NotImplementedError
 
+    def apply_move(self, move: Any) -> Any:
+        """
+        Apply move to this GameState in place, as make_move would to a new
+        GameState, and return a token that undo_move takes to put it back.
+
+        Games are not required to support this; strategies check with
+        supports_apply and use make_move otherwise.
+        """
+        raise NotImplementedError
+
+    def undo_move(self, token: Any) -> None:
+        """
+        Take back the move that apply_move returned token for, which must be
+        the last move applied to this GameState and not yet taken back.
+        """
+        raise NotImplementedError
+
     def is_valid_move(self, move: Any) -> bool:
         """
         Return whether move is a valid move for this GameState.
@@ -76,6 +93,16 @@ class GameState:
         raise NotImplementedError
 
 
+def supports_apply(state: GameState) -> bool:
+    """
+    Return whether the class of state implements apply_move and undo_move.
+
+    >>> supports_apply(GameState(True))
+    False
+    """
+    return type(state).apply_move is not GameState.apply_move
+
+
 if __name__ == "__main__":
     from python_ta import check_all
     check_all(config="a2_pyta.txt")
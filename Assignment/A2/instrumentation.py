@@ -0,0 +1,274 @@
+"""
+Opt-in instrumentation for strategies.
+
+While an Instrumentation is installed, the strategies in a registry such as
+game_interface.usable_strategies are wrapped, and so are make_move,
+apply_move and get_possible_moves of every GameState subclass,
+MinimaxStack.add and TranspositionTable.get.  Each call to a wrapped
+strategy (one decision) is then recorded with its wall time, the calls it
+made to make_move (counting apply_move as well) and get_possible_moves, the
+deepest call stack and the largest MinimaxStack it
+reached, and its transposition table hits and misses.
+
+    >>> from game_interface import usable_strategies
+    >>> from match_runner import make_game
+    >>> from subtract_square_game import SubtractSquareGame
+    >>> game = make_game(SubtractSquareGame, True, "10")
+    >>> with Instrumentation(usable_strategies) as probe:
+    ...     move = usable_strategies['mr'](game)
+    >>> decision = probe.decisions[0]
+    >>> decision["strategy"], decision["move"], decision["make_move"]
+    ('minimax_recursive_strategy', 1, 51)
+
+Work done in other processes (minimax_parallel_strategy's workers, or
+match_runner with several workers) is not seen.
+
+NOTE: You do not have to run python-ta on this file.
+"""
+import cProfile
+import sys
+import time
+from functools import wraps
+from typing import Any, Callable
+from game_state import GameState
+from minimax_stack import MinimaxStack
+from transposition_table import TranspositionTable
+
+
+def _frame_depth() -> int:
+    """
+    Return the number of frames on the caller's call stack.
+    """
+    depth = 0
+    frame = sys._getframe(1)
+    while frame is not None:
+        depth += 1
+        frame = frame.f_back
+    return depth
+
+
+def _state_classes(cls: type = GameState) -> list:
+    """
+    Return cls and every subclass of it loaded so far.
+    """
+    classes = [cls]
+    for sub in cls.__subclasses__():
+        classes.extend(_state_classes(sub))
+    return classes
+
+
+class Instrumentation:
+    """
+    Records the cost of every decision made by the strategies in a registry.
+
+    strategies - the registry (a dict of strategies) to instrument
+    decisions - one dict per strategy call, in the order they finished
+    profile - whether to run decisions under cProfile as well
+    """
+    strategies: dict
+    decisions: list
+    profile: bool
+
+    def __init__(self, strategies: dict, profile: bool = False) -> None:
+        """
+        Create an Instrumentation for strategies, not yet installed.
+        """
+        self.strategies = strategies
+        self.decisions = []
+        self.profile = profile
+        self._profiler = cProfile.Profile() if profile else None
+        self._current = None
+        self._originals = []
+
+    def __enter__(self) -> 'Instrumentation':
+        """
+        Install self for the body of a with statement.
+        """
+        self.install()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        """
+        Uninstall self at the end of a with statement.
+        """
+        self.uninstall()
+
+    def install(self) -> None:
+        """
+        Wrap the strategies in self.strategies and the methods counted.
+        """
+        if self._originals:
+            return
+        for key, strategy in list(self.strategies.items()):
+            if strategy is not None:
+                self._replace(self.strategies, key, self.wrap(strategy))
+        for cls in _state_classes():
+            if "make_move" in vars(cls):
+                self._replace_method(cls, "make_move", True)
+            if "apply_move" in vars(cls):
+                self._replace_method(cls, "apply_move", True, "make_move")
+            if "get_possible_moves" in vars(cls):
+                self._replace_method(cls, "get_possible_moves", False)
+        self._patch_stack()
+        self._patch_table()
+
+    def uninstall(self) -> None:
+        """
+        Put back everything install replaced.
+        """
+        while self._originals:
+            target, name, original = self._originals.pop()
+            if isinstance(target, dict):
+                target[name] = original
+            else:
+                setattr(target, name, original)
+
+    def wrap(self, strategy: Callable) -> Callable:
+        """
+        Return strategy wrapped so that each of its decisions is recorded.
+        """
+        @wraps(strategy)
+        def instrumented(game: Any, *args: Any, **kwargs: Any) -> Any:
+            """
+            Make and record one decision with strategy.
+            """
+            if self._current is not None:
+                return strategy(game, *args, **kwargs)
+            player = game.current_state.get_current_player_name()
+            self._current = {"strategy": strategy.__name__, "player": player,
+                             "make_move": 0, "get_possible_moves": 0,
+                             "max_call_depth": 0, "max_stack_size": 0,
+                             "cache_hits": 0, "cache_misses": 0}
+            self._current["base"] = _frame_depth()
+            if self._profiler is not None:
+                self._profiler.enable()
+            start = time.perf_counter()
+            try:
+                move = strategy(game, *args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                if self._profiler is not None:
+                    self._profiler.disable()
+                decision = self._current
+                self._current = None
+            del decision["base"]
+            decision["move"] = move
+            decision["seconds"] = elapsed
+            self.decisions.append(decision)
+            return move
+        return instrumented
+
+    def report(self) -> dict:
+        """
+        Return the decisions recorded so far, and their totals per strategy.
+
+        Each strategy's totals are its number of decisions, total and mean
+        seconds, total make_move and get_possible_moves calls, total cache
+        hits and misses, and the largest call depth and stack size.
+        """
+        totals = {}
+        for d in self.decisions:
+            t = totals.setdefault(d["strategy"], {
+                "decisions": 0, "seconds": 0.0, "make_move": 0,
+                "get_possible_moves": 0, "cache_hits": 0, "cache_misses": 0,
+                "max_call_depth": 0, "max_stack_size": 0})
+            t["decisions"] += 1
+            for name in ["seconds", "make_move", "get_possible_moves",
+                         "cache_hits", "cache_misses"]:
+                t[name] += d[name]
+            for name in ["max_call_depth", "max_stack_size"]:
+                t[name] = max(t[name], d[name])
+        for t in totals.values():
+            t["mean_seconds"] = t["seconds"] / t["decisions"]
+        return {"decisions": self.decisions, "strategies": totals}
+
+    def dump_stats(self, path: str) -> None:
+        """
+        Write the cProfile statistics of every decision so far to path, in
+        the format read by pstats and snakeviz.
+        """
+        if self._profiler is None:
+            raise ValueError("This Instrumentation was made without profile!")
+        self._profiler.dump_stats(path)
+
+    def _replace(self, target: Any, name: str, new: Any) -> None:
+        """
+        Set name of target (a dict or an object) to new, remembering the
+        original value for uninstall.
+        """
+        if isinstance(target, dict):
+            self._originals.append((target, name, target[name]))
+            target[name] = new
+        else:
+            self._originals.append((target, name, vars(target)[name]))
+            setattr(target, name, new)
+
+    def _replace_method(self, cls: type, name: str, depth: bool,
+                        counter: str = None) -> None:
+        """
+        Wrap method name of cls so that each call inside a decision is
+        counted under counter (name by default), measuring its call depth as
+        well if depth.
+        """
+        original = vars(cls)[name]
+        if counter is None:
+            counter = name
+
+        @wraps(original)
+        def counted(*args: Any, **kwargs: Any) -> Any:
+            """
+            Count this call, then make it.
+            """
+            current = self._current
+            if current is not None:
+                current[counter] += 1
+                if depth:
+                    current["max_call_depth"] = max(
+                        current["max_call_depth"],
+                        _frame_depth() - current["base"])
+            return original(*args, **kwargs)
+        self._replace(cls, name, counted)
+
+    def _patch_stack(self) -> None:
+        """
+        Wrap MinimaxStack.add to record the largest stack in a decision.
+        """
+        original = MinimaxStack.add
+
+        @wraps(original)
+        def add(stack: MinimaxStack, obj: Any) -> None:
+            """
+            Add obj to stack, recording its new size.
+            """
+            original(stack, obj)
+            current = self._current
+            if current is not None:
+                current["max_stack_size"] = max(current["max_stack_size"],
+                                                len(stack._contains))
+        self._replace(MinimaxStack, "add", add)
+
+    def _patch_table(self) -> None:
+        """
+        Wrap TranspositionTable.get to count hits and misses in a decision.
+        """
+        original = TranspositionTable.get
+
+        @wraps(original)
+        def get(table: TranspositionTable, state: Any) -> Any:
+            """
+            Look state up in table, counting the hit or miss.
+            """
+            score = original(table, state)
+            current = self._current
+            if current is not None:
+                if score is None:
+                    current["cache_misses"] += 1
+                else:
+                    current["cache_hits"] += 1
+            return score
+        self._replace(TranspositionTable, "get", get)
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,58 @@
+import unittest
+
+from instrumentation import Instrumentation
+from match_runner import make_game
+from game_interface import playable_games, usable_strategies
+from stonehenge import StonehengeState
+from transposition_table import TranspositionTable
+
+StonehengeGame = playable_games['h']
+
+
+class InstrumentationUnitTests(unittest.TestCase):
+    def test_uninstall_restores(self):
+        strategies = dict(usable_strategies)
+        make_move = StonehengeState.make_move
+        get = TranspositionTable.get
+        with Instrumentation(strategies):
+            self.assertIsNot(strategies['mr'], usable_strategies['mr'])
+            self.assertIsNot(StonehengeState.make_move, make_move)
+        self.assertEqual(strategies, usable_strategies)
+        self.assertIs(StonehengeState.make_move, make_move)
+        self.assertIs(TranspositionTable.get, get)
+
+    def test_decision_counts(self):
+        strategies = {'ar': usable_strategies['ar'],
+                      'ai': usable_strategies['ai'],
+                      'mi': usable_strategies['mi']}
+        game = make_game(StonehengeGame, True, "2")
+        with Instrumentation(strategies) as probe:
+            moves = [strategies[key](game) for key in ['ar', 'ai', 'mi']]
+        self.assertEqual(moves, [d["move"] for d in probe.decisions])
+        ar, ai, mi = probe.decisions
+        self.assertEqual(ar["make_move"], 133)
+        self.assertEqual(ai["make_move"], 133)
+        self.assertEqual(mi["make_move"], 6991)
+        self.assertGreater(ar["max_call_depth"], ai["max_call_depth"])
+        self.assertGreater(mi["max_stack_size"], 0)
+        self.assertEqual(ar["max_stack_size"], 0)
+        report = probe.report()
+        self.assertEqual(report["strategies"]["minimax_iterative_strategy"]
+                         ["decisions"], 1)
+
+    def test_cache_hits(self):
+        strategies = {'mr': usable_strategies['mr']}
+        game = make_game(StonehengeGame, True, "2")
+        table = TranspositionTable()
+        with Instrumentation(strategies) as probe:
+            strategies['mr'](game, table)
+            strategies['mr'](game, table)
+        first, second = probe.decisions
+        self.assertGreater(first["cache_hits"], 0)
+        self.assertEqual(second["make_move"], len(
+            game.current_state.get_possible_moves()))
+        self.assertEqual(second["cache_hits"], second["make_move"])
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,222 @@
+"""
+A headless runner for playing strategies against each other.
+
+GameInterface asks its questions with input() and prints every move, which
+is right for a person at the keyboard but not for playing hundreds of games
+between two strategies.  This module plays the same games without either:
+setup questions are answered from a string, and each finished game is
+written as one line of JSON.
+
+Run "python match_runner.py -h" for the command line options, e.g.
+"python match_runner.py h 2 ro mr -n 20 --alternate -o results.jsonl".
+
+NOTE: You do not have to run python-ta on this file.
+"""
+import argparse
+import json
+import math
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable
+from unittest.mock import patch
+
+
+def make_game(game: Any, p1_starts: bool, answer: str) -> Any:
+    """
+    Return a new game, answering its setup question with answer.
+    """
+    with patch('builtins.input', return_value=answer):
+        return game(p1_starts)
+
+
+def play_game(game: Any, setup: str, p1_strategy: Callable,
+              p2_strategy: Callable, p1_starts: bool = True) -> dict:
+    """
+    Play one game of game (set up by answering setup) between p1_strategy
+    and p2_strategy, the way GameInterface.play does but silently, and
+    return what happened.
+
+    The result has the winner ("p1", "p2" or None for a tie), the moves
+    made, who made each one and the seconds each took to choose.
+
+    >>> from subtract_square_game import SubtractSquareGame
+    >>> from strategy import minimax_recursive_strategy as mr
+    >>> r = play_game(SubtractSquareGame, "5", mr, mr)
+    >>> r["winner"], r["moves"], r["players"]
+    ('p2', [1, 4], ['p1', 'p2'])
+    """
+    g = make_game(game, p1_starts, setup)
+    state = g.current_state
+    moves = []
+    players = []
+    latencies = []
+    while not g.is_over(state):
+        player = state.get_current_player_name()
+        strategy = p1_strategy if player == "p1" else p2_strategy
+        move = None
+        start = time.perf_counter()
+        while not state.is_valid_move(move):
+            move = strategy(g)
+        latencies.append(time.perf_counter() - start)
+        moves.append(move)
+        players.append(player)
+        g.current_state = state.make_move(move)
+        state = g.current_state
+    winner = None
+    if g.is_winner("p1"):
+        winner = "p1"
+    elif g.is_winner("p2"):
+        winner = "p2"
+    return {"p1_starts": p1_starts, "winner": winner, "moves": moves,
+            "players": players, "latencies": latencies}
+
+
+def percentile(values: list, fraction: float) -> float:
+    """
+    Return the nearest-rank percentile fraction (from 0 to 1) of values,
+    or 0.0 if values is empty.
+
+    >>> percentile([4, 1, 3, 2], 0.5), percentile([4, 1, 3, 2], 1)
+    (2, 4)
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(fraction * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(results: list, seconds: float) -> dict:
+    """
+    Return the win rates, moves per second and per-player move latency
+    percentiles of results, games which took seconds in total to play.
+
+    >>> s = summarize([{"winner": "p1", "players": ["p1"],
+    ...                 "latencies": [0.5]}], 2.0)
+    >>> s["p1_win_rate"], s["moves_per_second"], s["p1_latency"]["p50"]
+    (1.0, 0.5, 0.5)
+    """
+    n = len(results)
+    summary = {"games": n, "seconds": seconds}
+    for winner in ["p1", "p2", None]:
+        wins = sum(1 for r in results if r["winner"] == winner)
+        name = "tie_rate" if winner is None else winner + "_win_rate"
+        summary[name] = wins / n if n else 0.0
+    total_moves = sum(len(r["players"]) for r in results)
+    summary["moves"] = total_moves
+    summary["moves_per_second"] = total_moves / seconds if seconds else 0.0
+    for player in ["p1", "p2"]:
+        latencies = [latency for r in results
+                     for p, latency in zip(r["players"], r["latencies"])
+                     if p == player]
+        summary[player + "_latency"] = {
+            "p50": percentile(latencies, 0.5),
+            "p90": percentile(latencies, 0.9),
+            "p99": percentile(latencies, 0.99),
+            "max": percentile(latencies, 1)}
+    return summary
+
+
+def run_matches(game: Any, setup: str, p1_strategy: Callable,
+                p2_strategy: Callable, n: int = 10, workers: int = 1,
+                alternate: bool = False, out: Any = None) -> dict:
+    """
+    Play n games of game (set up by answering setup) between p1_strategy
+    and p2_strategy, and return their summary (see summarize).
+
+    Player 1 starts every game, or every other game if alternate.  With
+    workers above 1 the games are played in that many processes, so game
+    and both strategies must be picklable (module-level classes and
+    functions are).  Each result is written to out as a line of JSON, in
+    the order the games finish, if out is given.
+
+    >>> from subtract_square_game import SubtractSquareGame
+    >>> from strategy import minimax_recursive_strategy as mr
+    >>> s = run_matches(SubtractSquareGame, "5", mr, mr, 4, alternate=True)
+    >>> s["games"], s["p1_win_rate"], s["p2_win_rate"]
+    (4, 0.5, 0.5)
+    """
+    starts = [not alternate or i % 2 == 0 for i in range(n)]
+    results = []
+    start = time.perf_counter()
+
+    def record(i: int, result: dict) -> None:
+        """
+        Keep result, the outcome of game number i, and stream it to out.
+        """
+        result["game"] = i
+        results.append(result)
+        if out is not None:
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+
+    if workers <= 1:
+        for i in range(n):
+            record(i, play_game(game, setup, p1_strategy, p2_strategy,
+                                starts[i]))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(play_game, game, setup, p1_strategy,
+                                   p2_strategy, starts[i]): i
+                       for i in range(n)}
+            for future in as_completed(futures):
+                record(futures[future], future.result())
+    return summarize(results, time.perf_counter() - start)
+
+
+def main(argv: list = None) -> dict:
+    """
+    Run matches as asked on the command line argv, print their summary and
+    return it.
+    """
+    from game_interface import playable_games, usable_strategies
+    parser = argparse.ArgumentParser(
+        description="Play two strategies against each other.")
+    parser.add_argument("game", choices=sorted(playable_games))
+    parser.add_argument("setup", help="the answer to the game's setup "
+                                      "question, e.g. the side length")
+    parser.add_argument("p1", choices=sorted(usable_strategies))
+    parser.add_argument("p2", choices=sorted(usable_strategies))
+    parser.add_argument("-n", "--games", type=int, default=10)
+    parser.add_argument("-w", "--workers", type=int, default=1)
+    parser.add_argument("--alternate", action="store_true",
+                        help="let player 2 start every other game")
+    parser.add_argument("-o", "--output",
+                        help="write each game to this JSON Lines file")
+    parser.add_argument("--report",
+                        help="write the instrumentation report (see "
+                             "instrumentation.py) to this JSON file")
+    parser.add_argument("--profile",
+                        help="write the cProfile statistics of every "
+                             "decision to this file")
+    args = parser.parse_args(argv)
+    probe = None
+    if args.report or args.profile:
+        if args.workers > 1:
+            parser.error("--report and --profile need a single worker")
+        from instrumentation import Instrumentation
+        probe = Instrumentation(usable_strategies, bool(args.profile))
+        probe.install()
+    out = open(args.output, "w") if args.output else None
+    try:
+        summary = run_matches(playable_games[args.game], args.setup,
+                              usable_strategies[args.p1],
+                              usable_strategies[args.p2], args.games,
+                              args.workers, args.alternate, out)
+    finally:
+        if out is not None:
+            out.close()
+        if probe is not None:
+            probe.uninstall()
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(probe.report(), f, indent=2)
+    if args.profile:
+        probe.dump_stats(args.profile)
+    print(json.dumps(summary, indent=2))
+    return summary
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
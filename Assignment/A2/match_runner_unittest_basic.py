@@ -0,0 +1,58 @@
+import io
+import json
+import unittest
+
+from match_runner import play_game, run_matches, percentile
+from game_interface import playable_games, usable_strategies
+
+SubtractSquareGame = playable_games['s']
+StonehengeGame = playable_games['h']
+minimax = usable_strategies['mr']
+rough_outcome = usable_strategies['ro']
+
+
+class MatchRunnerUnitTests(unittest.TestCase):
+    def test_play_game(self):
+        result = play_game(StonehengeGame, "2", rough_outcome, minimax)
+        self.assertIn(result["winner"], ["p1", "p2"])
+        self.assertEqual(result["players"][0], "p1")
+        self.assertEqual(len(result["moves"]), len(result["latencies"]))
+        # The player who made the last move wins stonehenge
+        self.assertEqual(result["winner"], result["players"][-1])
+
+    def test_alternate_starts(self):
+        out = io.StringIO()
+        summary = run_matches(SubtractSquareGame, "20", minimax, minimax, 4,
+                              alternate=True, out=out)
+        lines = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(len(lines), 4)
+        self.assertEqual([line["p1_starts"] for line in lines],
+                         [True, False, True, False])
+        self.assertEqual(summary["games"], 4)
+        self.assertAlmostEqual(summary["p1_win_rate"] +
+                               summary["p2_win_rate"] +
+                               summary["tie_rate"], 1.0)
+
+    def test_workers_match_serial(self):
+        serial = io.StringIO()
+        parallel = io.StringIO()
+        run_matches(StonehengeGame, "2", rough_outcome, minimax, 4,
+                    alternate=True, out=serial)
+        run_matches(StonehengeGame, "2", rough_outcome, minimax, 4,
+                    workers=2, alternate=True, out=parallel)
+
+        def games(out):
+            lines = [json.loads(line) for line in out.getvalue().splitlines()]
+            return sorted((line["game"], line["winner"], line["moves"])
+                          for line in lines)
+        self.assertEqual(games(serial), games(parallel))
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 0.5), 50)
+        self.assertEqual(percentile(values, 0.99), 99)
+        self.assertEqual(percentile([], 0.5), 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,273 @@
+"""
+A Monte Carlo tree search (UCT) strategy.
+
+Minimax has to see the whole game before it can choose a move, which is
+out of reach on stonehenge boards of side 4 or more.  Monte Carlo tree
+search instead plays many random games (playouts) from the current
+position, growing a tree of the positions it has visited and steering later
+playouts towards the moves that have won most often, while still trying
+the moves it knows little about (the UCT rule).  It only needs the game to
+provide get_possible_moves, make_move, is_over and is_winner, and it can be
+stopped after any number of playouts.
+"""
+import math
+import os
+import random
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Callable
+from minimax_tree import find_subtree
+
+
+class MCTSNode:
+    """
+    A position in the tree of a Monte Carlo search.
+
+    state - the position
+    player - the player to move in state
+    move - the move that reached state from the parent, or None at the root
+    parent - the node of the position before move, or None at the root
+    children - the nodes expanded from this one so far
+    untried - the moves from state that have no node yet
+    visits - the number of playouts that passed through this node
+    reward - the total reward of those playouts for the player who made
+             move: 1 for each win, 0.5 for each tie
+    """
+    __slots__ = ("state", "player", "move", "parent", "children", "untried",
+                 "visits", "reward")
+    state: Any
+    player: str
+    move: Any
+    parent: Any
+    children: list
+    untried: list
+    visits: int
+    reward: float
+
+    def __init__(self, state: Any, move: Any = None,
+                 parent: 'MCTSNode' = None) -> None:
+        """
+        Create a new MCTSNode self for state, reached by move from parent,
+        which has not been visited yet.
+        """
+        self.state = state
+        self.player = state.get_current_player_name()
+        self.move = move
+        self.parent = parent
+        self.children = []
+        self.untried = list(reversed(state.get_possible_moves()))
+        self.visits = 0
+        self.reward = 0.0
+
+
+class MonteCarloSearch:
+    """
+    Chooses moves by UCT, keeping its tree from one move to the next.
+
+    playouts - the number of playouts per move, if budget is None
+    budget - the seconds to think per move, or None to count playouts
+    exploration - the UCT constant; larger values try less promising
+                  moves more often
+    reuse - whether to start each search from the subtree of the position
+            the game reached, instead of an empty tree
+    root - the tree of the last search, or None
+    rng - the random number generator used for the playouts
+    playout - a function returning the winner ("p1", "p2" or None for a
+              tie) of one random game played on from a state, such as
+              stonehenge_playout.PlayoutKernel.winner, or None to play the
+              game with make_move
+    """
+    playouts: int
+    budget: Any
+    exploration: float
+    reuse: bool
+    root: Any
+    rng: random.Random
+    playout: Callable[[Any], Any]
+
+    def __init__(self, playouts: int = 1000, budget: float = None,
+                 exploration: float = math.sqrt(2), reuse: bool = True,
+                 seed: Any = None,
+                 playout: Callable[[Any], Any] = None) -> None:
+        """
+        Create a new MonteCarloSearch self with an empty tree, whose
+        playouts are drawn from a generator seeded with seed.
+        """
+        self.playouts = playouts
+        self.budget = budget
+        self.exploration = exploration
+        self.reuse = reuse
+        self.root = None
+        self.rng = random.Random(seed)
+        self.playout = playout
+
+    def choose(self, game: Any) -> Any:
+        """
+        Return the move from game.current_state that the most playouts of
+        its search (see search) went through.
+
+        >>> from match_runner import make_game
+        >>> from subtract_square_game import SubtractSquareGame
+        >>> game = make_game(SubtractSquareGame, True, "8")
+        >>> MonteCarloSearch(300, seed=0).choose(game)
+        1
+        """
+        root = self.search(game)
+        best = None
+        for child in root.children:
+            if best is None or child.visits > best.visits:
+                best = child
+        if best is None:
+            return None
+        return best.move
+
+    def search(self, game: Any) -> MCTSNode:
+        """
+        Search from game.current_state for self.budget seconds, or for
+        self.playouts playouts if there is no budget, and return the root of
+        the tree.  game.current_state is left as it was.
+        """
+        state = game.current_state
+        root = self.take(state)
+        if self.budget is None:
+            for _ in range(self.playouts):
+                self._playout(game, root)
+        else:
+            deadline = time.perf_counter() + self.budget
+            while time.perf_counter() < deadline:
+                self._playout(game, root)
+        game.current_state = state
+        self.root = root if self.reuse else None
+        return root
+
+    def take(self, state: Any) -> MCTSNode:
+        """
+        Return the node of state in the kept tree (see
+        minimax_tree.find_subtree), detached from its parent, or a new node
+        for state if the kept tree does not have one.
+        """
+        found = find_subtree(self.root, state, lambda node: node.state)
+        self.root = None
+        if found is None:
+            return MCTSNode(state)
+        found.parent = None
+        return found
+
+    def _playout(self, game: Any, root: MCTSNode) -> None:
+        """
+        Play one game from root: choose moves by UCT while every move has a
+        node, add a node for one new move, play randomly from there until
+        the game is over, and record the winner in every node on the way.
+        """
+        node = root
+        while not node.untried and node.children:
+            node = self._select(node)
+        if node.untried:
+            move = node.untried.pop()
+            child = MCTSNode(node.state.make_move(move), move, node)
+            node.children.append(child)
+            node = child
+        if self.playout is not None:
+            winner = self.playout(node.state)
+        else:
+            state = node.state
+            while not game.is_over(state):
+                state = state.make_move(self.rng.choice(
+                    state.get_possible_moves()))
+            game.current_state = state
+            winner = None
+            if game.is_winner("p1"):
+                winner = "p1"
+            elif game.is_winner("p2"):
+                winner = "p2"
+        while node is not None:
+            node.visits += 1
+            if node.parent is not None:
+                if winner is None:
+                    node.reward += 0.5
+                elif winner == node.parent.player:
+                    node.reward += 1
+            node = node.parent
+
+    def _select(self, node: MCTSNode) -> MCTSNode:
+        """
+        Return the child of node with the highest upper confidence bound.
+        """
+        log_visits = math.log(node.visits)
+        best = None
+        best_bound = -1.0
+        for child in node.children:
+            bound = (child.reward / child.visits + self.exploration *
+                     math.sqrt(log_visits / child.visits))
+            if bound > best_bound:
+                best = child
+                best_bound = bound
+        return best
+
+
+# The search used by mcts_strategy, so that its tree is kept between moves.
+SHARED_SEARCH = MonteCarloSearch()
+
+
+def mcts_strategy(game: Any, search: MonteCarloSearch = None) -> Any:
+    """
+    Return the move chosen by search, or by SHARED_SEARCH (1000 playouts
+    per move, reusing its tree) if search is None.
+    """
+    if search is None:
+        search = SHARED_SEARCH
+    return search.choose(game)
+
+
+def get_root_visits(game: Any, playouts: int, budget: Any,
+                    seed: int) -> list:
+    """
+    Return (move, visits) for each move searched from game.current_state
+    by a new MonteCarloSearch of playouts playouts or budget seconds, with
+    its playouts seeded by seed.
+
+    This is the unit of work mcts_parallel_strategy hands to a worker.
+    """
+    root = MonteCarloSearch(playouts, budget, reuse=False,
+                            seed=seed).search(game)
+    return [(child.move, child.visits) for child in root.children]
+
+
+def mcts_parallel_strategy(game: Any, workers: int = None,
+                           playouts: int = 1000, budget: float = None,
+                           pool: Executor = None) -> Any:
+    """
+    Return the move with the most visits over independent searches from
+    game.current_state run in workers processes at once (root
+    parallelism): each searches for playouts playouts, or budget seconds
+    if given, with differently seeded playouts.
+
+    workers is the number of processes to start, and of searches to run
+    (one per CPU by default); pass pool instead to reuse an already running
+    executor across moves, with workers set to the number of searches to
+    hand it.  The workers start from empty trees, so nothing is reused
+    between moves.
+    """
+    if pool is None:
+        with ProcessPoolExecutor(max_workers=workers) as new_pool:
+            return mcts_parallel_strategy(game, workers, playouts, budget,
+                                          new_pool)
+    n = workers or os.cpu_count() or 1
+    seeds = [random.randrange(2 ** 32) for _ in range(n)]
+    totals = {}
+    for visits in pool.map(get_root_visits, [game] * n, [playouts] * n,
+                           [budget] * n, seeds):
+        for move, count in visits:
+            totals[move] = totals.get(move, 0) + count
+    best = None
+    for move in game.current_state.get_possible_moves():
+        if best is None or totals.get(move, 0) > totals.get(best, 0):
+            best = move
+    return best
+
+
+if __name__ == "__main__":
+    from python_ta import check_all
+    check_all(config="a2_pyta.txt")
+    import doctest
+    doctest.testmod()
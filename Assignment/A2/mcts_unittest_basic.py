@@ -0,0 +1,74 @@
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+from mcts import MonteCarloSearch, mcts_parallel_strategy
+from stonehenge_playout import PlayoutKernel
+from match_runner import make_game
+from game_interface import playable_games
+
+SubtractSquareGame = playable_games['s']
+StonehengeGame = playable_games['h']
+
+
+class MonteCarloUnitTests(unittest.TestCase):
+    def test_finds_win(self):
+        # Only taking 1 (leaving 7 or 12) wins from 8 and from 13
+        for total in ["8", "13"]:
+            game = make_game(SubtractSquareGame, True, total)
+            state = game.current_state
+            move = MonteCarloSearch(500, seed=1).choose(game)
+            self.assertEqual(move, 1)
+            self.assertIs(game.current_state, state)
+
+    def test_seeded_searches_agree(self):
+        game = make_game(StonehengeGame, True, "3")
+        first = MonteCarloSearch(200, seed=7).search(game)
+        second = MonteCarloSearch(200, seed=7).search(game)
+        self.assertEqual([(c.move, c.visits) for c in first.children],
+                         [(c.move, c.visits) for c in second.children])
+        self.assertEqual(first.visits, 200)
+        self.assertEqual(sum(c.visits for c in first.children), 200)
+
+    def test_reuse_keeps_visits(self):
+        game = make_game(StonehengeGame, True, "3")
+        search = MonteCarloSearch(300, seed=3)
+        move = search.choose(game)
+        child = [c for c in search.root.children if c.move == move][0]
+        visits = child.visits
+        game.current_state = game.current_state.make_move(move)
+        root = search.search(game)
+        self.assertIs(root, child)
+        self.assertIsNone(root.parent)
+        self.assertEqual(root.visits, visits + 300)
+        fresh = MonteCarloSearch(300, reuse=False, seed=3)
+        fresh.choose(game)
+        self.assertIsNone(fresh.root)
+
+    def test_playout_hook(self):
+        game = make_game(StonehengeGame, True, "3")
+        kernel = PlayoutKernel(3, seed=0)
+        states = []
+
+        def playout(state):
+            states.append(state)
+            return kernel.winner(state)
+        search = MonteCarloSearch(100, seed=0, playout=playout)
+        self.assertIn(search.choose(game),
+                      game.current_state.get_possible_moves())
+        self.assertEqual(len(states), 100)
+        self.assertEqual(search.root.visits, 100)
+
+    def test_budget(self):
+        game = make_game(StonehengeGame, True, "4")
+        root = MonteCarloSearch(budget=0.05, seed=0).search(game)
+        self.assertGreater(root.visits, 0)
+
+    def test_parallel(self):
+        game = make_game(SubtractSquareGame, True, "13")
+        with ProcessPoolExecutor(max_workers=2) as pool:
+            move = mcts_parallel_strategy(game, 2, 300, pool=pool)
+        self.assertEqual(move, 1)
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -1,17 +1,26 @@
 """
 A Tree class for minimax strategy.
 """
-from typing import Any
+from typing import Any, Callable, Iterator
 from game_state import GameState
+from transposition_table import state_key
 
 
 class MinimaxTree:
     """
     A bare-bones Tree ADT that identifies the root with the entire tree.
+
+    depth - the number of moves between the root of the search and self
+    alpha, beta - the window of scores still of interest to an alpha-beta
+                  search at self
+    moves - the moves from value in the order they are searched, or None
+            before self is expanded
     """
 
     def __init__(self, value: GameState, move: Any,
-                 children: Any, score: Any) -> None:
+                 children: Any, score: Any, depth: int = 0,
+                 alpha: int = GameState.LOSE,
+                 beta: int = GameState.WIN) -> None:
         """
         Create Tree self with content value and 0 or more children.
         """
@@ -19,7 +28,147 @@ class MinimaxTree:
         self.move = move
         self.children = children
         self.score = score
+        self.depth = depth
+        self.alpha = alpha
+        self.beta = beta
+        self.moves = None
+
+
+class SearchFrame:
+    """
+    One position on the path of a memory-lean minimax search.
+
+    Unlike a MinimaxTree, a frame keeps no children: only the moves still to
+    try and the best score found so far, so a search holds one frame per
+    move between the root and the position being searched.
+
+    state - the position of this frame
+    move - the move from the parent's position to state, or None
+    moves - an iterator over the moves from state not yet searched
+    score - the best score found so far for the player to move at state
+    best - the first move from state found to lead to score, or None
+    parent - the frame of the position before state, or None at the root
+    """
+    __slots__ = ("state", "move", "moves", "score", "best", "parent")
+    state: GameState
+    move: Any
+    moves: Any
+    score: int
+    best: Any
+    parent: Any
+
+    def __init__(self, state: GameState, move: Any = None,
+                 parent: Any = None) -> None:
+        """
+        Create a SearchFrame self for state, reached by move from parent,
+        with no move from state searched yet.
+        """
+        self.state = state
+        self.move = move
+        self.moves = iter(state.get_possible_moves())
+        self.score = -2  # Lower than any score
+        self.best = None
+        self.parent = parent
+
+    def update(self, move: Any, score: int) -> None:
+        """
+        Record that move from state leads to a position where the player to
+        move there can score score, if that is better than any move so far.
+
+        >>> from subtract_square_state import SubtractSquareState
+        >>> frame = SearchFrame(SubtractSquareState(True, 5))
+        >>> frame.update(1, 1)
+        >>> frame.update(4, -1)
+        >>> frame.update(1, -1)
+        >>> frame.score, frame.best
+        (1, 4)
+        """
+        if -1 * score > self.score:
+            self.score = -1 * score
+            self.best = move
+
+
+class TreeKeeper:
+    """
+    Keeps the tree of one minimax search so that the next search can start
+    from the subtree of the position the game actually reached, instead of
+    searching it again.
+
+    root - the root of the kept tree, or None if no tree is kept
+    """
+    root: Any
 
+    def __init__(self) -> None:
+        """
+        Create a new TreeKeeper self, keeping no tree.
+        """
+        self.root = None
+
+    def keep(self, tree: MinimaxTree) -> None:
+        """
+        Keep tree, replacing any tree kept before.
+        """
+        self.root = tree
+
+    def take(self, state: GameState) -> MinimaxTree:
+        """
+        Return the kept subtree whose position is state, or a new tree for
+        state if there is none, and stop keeping anything else.
+
+        The subtree is found by find_subtree.  The sibling subtrees are
+        dropped, so their memory is freed.
+
+        >>> from subtract_square_state import SubtractSquareState
+        >>> root = MinimaxTree(SubtractSquareState(True, 5), None, [], None)
+        >>> child = MinimaxTree(SubtractSquareState(False, 4), 1, [], -1, 1)
+        >>> root.children.append(child)
+        >>> keeper = TreeKeeper()
+        >>> keeper.keep(root)
+        >>> keeper.take(SubtractSquareState(False, 4)) is child
+        True
+        >>> keeper.root is None
+        True
+        """
+        found = find_subtree(self.root, state, lambda node: node.value)
+        self.root = None
+        if found is None:
+            return MinimaxTree(state, None, [], None)
+        return found
+
+
+def tree_levels(root: Any, levels: int) -> Iterator:
+    """
+    Yield root, then its children, then its grandchildren and so on, for
+    levels levels of the tree.  Nothing is yielded if root is None.
+
+    >>> from subtract_square_state import SubtractSquareState
+    >>> root = MinimaxTree(SubtractSquareState(True, 5), None, [], None)
+    >>> root.children.append(MinimaxTree(None, 1, [], None))
+    >>> [node.move for node in tree_levels(root, 3)]
+    [None, 1]
+    """
+    level = [] if root is None else [root]
+    for _ in range(levels):
+        yield from level
+        level = [child for node in level for child in node.children]
+
+
+def find_subtree(root: Any, state: GameState,
+                 position: Callable[[Any], GameState]) -> Any:
+    """
+    Return the node of the tree under root (which may be None) whose
+    position, position(node), is state, with its move cleared, or None if
+    there is none.  Nodes only need a move and a list of children.
+
+    Only root, its children and its grandchildren are checked, which covers
+    the positions after one or two moves.
+    """
+    key = state_key(state)
+    for node in tree_levels(root, 3):
+        if state_key(position(node)) == key:
+            node.move = None
+            return node
+    return None
 
 if __name__ == '__main__':
     from python_ta import check_all
@@ -21,11 +21,23 @@ strategy with Chopsticks either, unless you handle repeated/looping states.
 import unittest
 from unittest.mock import patch
 import inspect
+import time
+
+from transposition_table import TranspositionTable
+from minimax_tree import TreeKeeper
+from game_state import GameState, supports_apply
 
 # Import the student solution
 from game_interface import playable_games, usable_strategies
 minimax_iterative_strategy = usable_strategies['mi']
 minimax_recursive_strategy = usable_strategies['mr']
+alphabeta_iterative_strategy = usable_strategies['ai']
+alphabeta_recursive_strategy = usable_strategies['ar']
+alphabeta_ordered_iterative_strategy = usable_strategies['aio']
+alphabeta_ordered_recursive_strategy = usable_strategies['aro']
+minimax_parallel_strategy = usable_strategies['mp']
+iterative_deepening_strategy = usable_strategies['id']
+minimax_lean_strategy = usable_strategies['ml']
 StonehengeGame = playable_games['h']
 SubtractSquareGame = playable_games['s']
 
@@ -44,6 +56,29 @@ STONEHENGE_MINIMAX_BOARD = """\
 """
 
 
+# Move sequences from the empty side 2 Stonehenge board
+STONEHENGE_OPENINGS = [[], ['A'], ['B', 'D'], ['A', 'F', 'D'], ['G', 'C', 'E']]
+
+
+def sample_games(max_total, stonehenge_openings):
+    """
+    Return a SubtractSquare game for each total from 1 to max_total, with
+    p1 starting on even totals, followed by a side 2 Stonehenge game after
+    each move sequence in stonehenge_openings.
+    """
+    games = []
+    for total in range(1, max_total + 1):
+        with patch('builtins.input', return_value=str(total)):
+            games.append(SubtractSquareGame(total % 2 == 0))
+    for moves in stonehenge_openings:
+        with patch('builtins.input', return_value='2'):
+            game = StonehengeGame(True)
+        for move in moves:
+            game.current_state = game.current_state.make_move(move)
+        games.append(game)
+    return games
+
+
 class MinimaxUnitTests(unittest.TestCase):
     def test_iterative_subtract_square_4(self):
         """
@@ -233,6 +268,178 @@ class MinimaxUnitTests(unittest.TestCase):
                              expected_move, move_chosen, str(new_state)
                          ))
 
+    def test_cached_minimax_matches_uncached(self):
+        """
+        Test that both minimax strategies choose the same move with and
+        without a transposition table, whatever its size and policy.
+        """
+        for total in [18, 25, 30]:
+            with patch('builtins.input', return_value=str(total)):
+                game = SubtractSquareGame(True)
+            expected = minimax_recursive_strategy(game)
+            for table in [TranspositionTable(), TranspositionTable(5),
+                          TranspositionTable(5, 'depth')]:
+                self.assertEqual(minimax_recursive_strategy(game, table),
+                                 expected)
+                self.assertEqual(minimax_iterative_strategy(game, table),
+                                 expected)
+                self.assertTrue(len(table) <= table.capacity)
+
+    def test_cached_minimax_reuses_table(self):
+        """
+        Test that a table shared across moves of one game is hit when the
+        next move is chosen.
+        """
+        with patch('builtins.input', return_value='2'):
+            game = StonehengeGame(True)
+        table = TranspositionTable()
+        game.current_state = game.current_state.make_move(
+            minimax_recursive_strategy(game, table))
+        hits, misses = table.hits, table.misses
+        game.current_state = game.current_state.make_move(
+            minimax_recursive_strategy(game, table))
+        self.assertTrue(table.hits > hits)
+        self.assertEqual(table.misses, misses)
+
+    def test_iterative_table_hits_count_nodes(self):
+        """
+        Test that iterative minimax looks each position up once: its table
+        hits equal the unfinished positions left unexpanded in its tree,
+        which are exactly the ones scored from the table.
+        """
+        with patch('builtins.input', return_value='20'):
+            game = SubtractSquareGame(True)
+        table = TranspositionTable()
+        keeper = TreeKeeper()
+        minimax_iterative_strategy(game, table, keeper)
+        answered = 0
+        level = [keeper.root]
+        while level:
+            answered += len([node for node in level if node.children == []
+                             and node.value.get_possible_moves() != []])
+            level = [c for node in level for c in node.children]
+        self.assertGreater(answered, 0)
+        self.assertEqual(table.hits, answered)
+
+    def test_alphabeta_matches_minimax(self):
+        """
+        Test that both alpha-beta strategies return exactly the move chosen
+        by minimax, on SubtractSquare and on Stonehenge positions.
+        """
+        for game in sample_games(30, STONEHENGE_OPENINGS):
+            state = game.current_state
+            expected = minimax_recursive_strategy(game)
+            self.assertEqual(alphabeta_recursive_strategy(game), expected)
+            self.assertEqual(alphabeta_iterative_strategy(game), expected)
+            self.assertIs(game.current_state, state)
+
+    def test_ordered_alphabeta_matches_minimax(self):
+        """
+        Test that alpha-beta with move ordering still returns exactly the
+        move chosen by minimax, including the tie-break between equal moves.
+        """
+        for game in sample_games(30, STONEHENGE_OPENINGS +
+                                 [['C', 'G']]):
+            expected = minimax_recursive_strategy(game)
+            self.assertEqual(alphabeta_ordered_recursive_strategy(game),
+                             expected)
+            self.assertEqual(alphabeta_ordered_iterative_strategy(game),
+                             expected)
+
+    def test_parallel_matches_recursive(self):
+        """
+        Test that the process-pool minimax returns exactly the move chosen
+        by recursive minimax.
+        """
+        with patch('builtins.input', return_value='25'):
+            square = SubtractSquareGame(True)
+        with patch('builtins.input', return_value='2'):
+            henge = StonehengeGame(True)
+        henge.current_state = henge.current_state.make_move('B')
+        for game in [square, henge]:
+            self.assertEqual(minimax_parallel_strategy(game, 2),
+                             minimax_recursive_strategy(game))
+
+    def test_iterative_deepening_reports_depth(self):
+        """
+        Test that iterative deepening solves small games exactly, choosing
+        minimax's move, and stays near its budget on a large board.
+        """
+        with patch('builtins.input', return_value='30'):
+            game = SubtractSquareGame(True)
+        info = {}
+        self.assertEqual(iterative_deepening_strategy(game, 10, info),
+                         minimax_recursive_strategy(game))
+        self.assertTrue(info['exact'])
+
+        with patch('builtins.input', return_value='4'):
+            game = StonehengeGame(True)
+        info = {}
+        start = time.perf_counter()
+        move = iterative_deepening_strategy(game, 0.1, info)
+        self.assertTrue(game.current_state.is_valid_move(move))
+        self.assertFalse(info['exact'])
+        self.assertTrue(time.perf_counter() - start < 2)
+
+    def test_kept_tree_matches_fresh_search(self):
+        """
+        Test that iterative minimax continuing from a kept tree chooses the
+        moves a fresh search would, without expanding anything after its
+        first move.
+        """
+        with patch('builtins.input', return_value='2'):
+            game = StonehengeGame(True)
+        keeper = TreeKeeper()
+        first = True
+        while not game.is_over(game.current_state):
+            expected = minimax_iterative_strategy(game)
+            state = game.current_state
+            expanded = []
+            original = type(state).make_move
+
+            def counted(*args):
+                expanded.append(1)
+                return original(*args)
+            with patch.object(type(state), 'make_move', counted):
+                move = minimax_iterative_strategy(game, None, keeper)
+            self.assertEqual(move, expected)
+            if not first:
+                self.assertEqual(expanded, [])
+            first = False
+            game.current_state = state.make_move(move)
+
+    def test_lean_minimax_matches_iterative(self):
+        """
+        Test that memory-lean minimax chooses exactly the move of iterative
+        minimax, and leaves the game as it was.
+        """
+        for game in sample_games(30, STONEHENGE_OPENINGS):
+            state = game.current_state
+            self.assertEqual(minimax_lean_strategy(game),
+                             minimax_iterative_strategy(game))
+            self.assertIs(game.current_state, state)
+
+    def test_apply_move_search_matches_make_move(self):
+        """
+        Test that minimax and alpha-beta choose the same moves searching
+        with apply_move as with make_move, and leave the state unchanged.
+        """
+        for game in sample_games(20, [[], ['A'], ['B', 'D'],
+                                      ['G', 'C', 'E']]):
+            state = game.current_state
+            before = repr(state)
+            chosen = [strategy(game) for strategy in
+                      [minimax_recursive_strategy,
+                       alphabeta_recursive_strategy]]
+            self.assertIs(game.current_state, state)
+            self.assertEqual(repr(state), before)
+            cls = type(state)
+            with patch.object(cls, 'apply_move', GameState.apply_move):
+                self.assertFalse(supports_apply(state))
+                self.assertEqual([minimax_recursive_strategy(game),
+                                  alphabeta_recursive_strategy(game)],
+                                 chosen)
+
 
 if __name__ == "__main__":
     unittest.main()
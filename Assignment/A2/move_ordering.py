@@ -0,0 +1,111 @@
+"""
+Move ordering for the alpha-beta strategies.
+
+Alpha-beta only skips a subtree once it has seen a move good enough to
+make the rest irrelevant, so the sooner the best move is tried, the more it
+skips.  A MoveOrdering sorts the moves at each node using a game-specific
+priority (see capture_priority), then killer moves (moves that recently
+caused a cutoff at the same depth), then the history of cutoffs caused by
+each move anywhere in the search.
+"""
+from typing import Any, Callable
+
+
+def capture_priority(state: Any, move: Any) -> tuple:
+    """
+    Return how urgent move is in state: the number of ley-lines it captures
+    for the player to move, then the number it takes away from the opponent.
+    Games without ley-lines give every move the same priority.
+
+    >>> from stonehenge import StonehengeState
+    >>> s = StonehengeState(True, 3).make_move('A').make_move('D')
+    >>> capture_priority(s, 'F'), capture_priority(s, 'K')
+    ((2, 1), (0, 0))
+    """
+    if not hasattr(state, "get_captures"):
+        return 0, 0
+    player = state.get_current_player_name()[1]
+    opponent = "2" if player == "1" else "1"
+    return (len(state.get_captures(move, player)),
+            len(state.get_captures(move, opponent)))
+
+
+class MoveOrdering:
+    """
+    Chooses the order moves are searched in, learning from the cutoffs of
+    the search it is used by.
+
+    priority - a function of a state and a move; moves with higher
+               priorities are searched first, or None
+    killers - for each depth, up to two moves that last caused a cutoff
+              there, the most recent first
+    history - for each move, the number of cutoffs it has caused
+    cutoffs - the number of cutoffs recorded
+    """
+    priority: Callable[[Any, Any], Any]
+    killers: dict
+    history: dict
+    cutoffs: int
+
+    def __init__(self, priority: Callable[[Any, Any], Any] = None,
+                 use_killers: bool = True, use_history: bool = True) -> None:
+        """
+        Create a new MoveOrdering self, which has seen no cutoffs.
+
+        Killer moves and the history heuristic can be turned off with
+        use_killers and use_history.
+        """
+        self.priority = priority
+        self.killers = {}
+        self.history = {}
+        self.cutoffs = 0
+        self._use_killers = use_killers
+        self._use_history = use_history
+
+    def order(self, state: Any, moves: list, depth: int) -> list:
+        """
+        Return moves, the possible moves from state at depth moves below
+        the root of the search, in the order to search them.  Moves that
+        tie keep their order in moves.
+
+        >>> o = MoveOrdering()
+        >>> o.cutoff(4, 1)
+        >>> o.cutoff(9, 2)
+        >>> o.cutoff(9, 3)
+        >>> o.order(None, [1, 4, 9], 1), o.order(None, [1, 4, 9], 5)
+        ([4, 9, 1], [9, 4, 1])
+        """
+        killers = self.killers.get(depth, [])
+
+        def key(move: Any) -> tuple:
+            """
+            Return the sort key of move, largest first.
+            """
+            killer = 0
+            if move in killers:
+                killer = 2 - killers.index(move)
+            return (self.priority(state, move) if self.priority else 0,
+                    killer, self.history.get(move, 0))
+        return sorted(moves, key=key, reverse=True)
+
+    def cutoff(self, move: Any, depth: int) -> None:
+        """
+        Record that move caused a cutoff depth moves below the root of the
+        search.
+        """
+        self.cutoffs += 1
+        if self._use_killers:
+            killers = self.killers.setdefault(depth, [])
+            if move in killers:
+                killers.remove(move)
+            killers.insert(0, move)
+            del killers[2:]
+        if self._use_history:
+            self.history[move] = self.history.get(move, 0) + 1
+
+
+if __name__ == "__main__":
+    from python_ta import check_all
+    check_all(config="a2_pyta.txt")
+    import doctest
+    doctest.testmod()
@@ -2,6 +2,7 @@
 A stonehenge game.
 """
 import copy
+import random
 from typing import Any
 from game import Game
 from game_state import GameState
@@ -17,7 +18,7 @@ class StonehengeGame(Game):
         Initialize this Game, using p1_starts to find who the first player is.
         """
         length = input("Enter the side length: ")
-        if length not in ["-1", "1", "2", "3", "4", "5"]:
+        if length != "-1" and not (length.isdigit() and int(length) >= 1):
             print("Invalid length {}!".format(length))
             length = input("Enter the side length: ")
         self.current_state = StonehengeState(p1_starts, int(length))
@@ -73,221 +74,316 @@ class StonehengeGame(Game):
 class StonehengeState(GameState):
     """
     The state of a stonehenge game at a certain point in time.
-    """
-    R1 = [["@", "A", "B"], ["@", "C"]]
-    DL1 = [["@", "A"], ["@", "B", "C"]]
-    DR1 = [["@", "A", "C"], ["@", "B"]]
-    R2 = [["@", "A", "B"], ["@", "C", "D", "E"], ["@", "F", "G"]]
-    DL2 = [["@", "A", "C"], ["@", "B", "D", "F"], ["@", "E", "G"]]
-    DR2 = [["@", "C", "F"], ["@", "A", "D", "G"], ["@", "B", "E"]]
-    R3 = [["@", "A", "B"], ["@", "C", "D", "E"],
-          ["@", "F", "G", "H", "I"], ["@", "J", "K", "L"]]
-    DL3 = [["@", "A", "C", "F"], ["@", "B", "D", "G", "J"],
-           ["@", "E", "H", "K"], ["@", "I", "L"]]
-    DR3 = [["@", "F", "J"], ["@", "C", "G", "K"],
-           ["@", "A", "D", "H", "L"], ["@", "B", "E", "I"]]
-    R4 = [["@", "A", "B"], ["@", "C", "D", "E"], ["@", "F", "G", "H", "I"],
-          ["@", "J", "K", "L", "M", "N"], ["@", "O", "P", "Q", "R"]]
-    DL4 = [["@", "A", "C", "F", "J"], ["@", "B", "D", "G", "K", "O"],
-           ["@", "E", "H", "L", "P"], ["@", "I", "M", "Q"], ["@", "N", "R"]]
-    DR4 = [["@", "J", "O"], ["@", "F", "K", "P"], ["@", "C", "G", "L", "Q"],
-           ["@", "A", "D", "H", "M", "R"], ["@", "B", "E", "I", "N"]]
-    R5 = [["@", "A", "B"], ["@", "C", "D", "E"], ["@", "F", "G", "H", "I"],
-          ["@", "J", "K", "L", "M", "N"], ["@", "O", "P", "Q", "R", "S", "T"],
-          ["@", "U", "V", "W", "X", "Y"]]
-    DL5 = [["@", "A", "C", "F", "J", "O"], ["@", "B", "D", "G", "K", "P", "U"],
-           ["@", "E", "H", "L", "Q", "V"], ["@", "I", "M", "R", "W"],
-           ["@", "N", "S", "X"], ["@", "T", "Y"]]
-    DR5 = [["@", "O", "U"], ["@", "J", "D", "V"], ["@", "F", "K", "Q", "W"],
-           ["@", "C", "G", "L", "R", "X"], ["@", "A", "D", "H", "M", "S", "Y"],
-           ["@", "B", "E", "I", "N", "T"]]
 
+    The board's geometry lives in a StonehengeBoard shared by every state of
+    the same side length; a state only holds what a move can change, in flat
+    lists indexed like the board's cells and ley-lines.
+
+    length - the side length of the board
+    board - the shared geometry of the board
+    cells - for each cell, its label, or "1"/"2" once a player claims it
+    owners - for each ley-line, "@", or "1"/"2" once a player captures it
+    claims - for "1" and "2", the number of cells that player has claimed
+             in each ley-line
+    unclaimed - the cells nobody has claimed yet, in order
+    n_p1, n_p2 - the number of ley-lines each player has captured
+    total - the number of ley-lines
+    key - the Zobrist hash of self: the XOR of the board's random number
+          for each claimed cell and captured ley-line, and for p2 to move
+    """
     def __init__(self, is_p1_turn: bool, length: int, row: list = None,
                  down_left: list = None, down_right: list = None) -> None:
         """
         Initialize this game state and set the current player based on
         is_p1_turn.
+
+        The board starts empty; to start from another board, pass length -1
+        and its row, down_left and down_right ley-lines in the form of r, dl
+        and dr.
         """
         super().__init__(is_p1_turn)
-        if length == 1:
-            self.r = copy.deepcopy(self.R1)
-            self.dl = copy.deepcopy(self.DL1)
-            self.dr = copy.deepcopy(self.DR1)
-        elif length == 2:
-            self.r = copy.deepcopy(self.R2)
-            self.dl = copy.deepcopy(self.DL2)
-            self.dr = copy.deepcopy(self.DR2)
-        elif length == 3:
-            self.r = copy.deepcopy(self.R3)
-            self.dl = copy.deepcopy(self.DL3)
-            self.dr = copy.deepcopy(self.DR3)
-        elif length == 4:
-            self.r = copy.deepcopy(self.R4)
-            self.dl = copy.deepcopy(self.DL4)
-            self.dr = copy.deepcopy(self.DR4)
-        elif length == 5:
-            self.r = copy.deepcopy(self.R5)
-            self.dl = copy.deepcopy(self.DL5)
-            self.dr = copy.deepcopy(self.DR5)
-        elif length == -1:
-            self.r = row[:]
-            self.dl = down_left[:]
-            self.dr = down_right[:]
-        self.state = [self.r, self.dl, self.dr]
-        count_p1 = 0
-        count_p2 = 0
-        count_total = 0
-        for l in self.state:
-            for i in l:
-                count_total += 1
-                if i[0] == "1":
-                    count_p1 += 1
-                elif i[0] == "2":
-                    count_p2 += 1
-        self.n_p1 = count_p1
-        self.n_p2 = count_p2
-        self.total = count_total
+        if length == -1:
+            length = len(row) - 1
+        self.length = length
+        self.board = get_board(length)
+        self.total = len(self.board.lines)
+        self.cells = self.board.labels[:]
+        self.owners = ["@"] * self.total
+        if row is not None:
+            for n, line in enumerate(row + down_left + down_right):
+                self.owners[n] = line[0]
+                for i, value in zip(self.board.lines[n], line[1:]):
+                    if value in ["1", "2"]:
+                        self.cells[i] = value
+        self.recount()
+
+    def recount(self) -> None:
+        """
+        Recompute claims, unclaimed, n_p1, n_p2 and key from cells and
+        owners.
+        """
+        self.claims = {}
+        for p in ["1", "2"]:
+            self.claims[p] = [[self.cells[i] for i in line].count(p)
+                              for line in self.board.lines]
+        self.unclaimed = [c for c in self.cells if c not in ["1", "2"]]
+        self.n_p1 = self.owners.count("1")
+        self.n_p2 = self.owners.count("2")
+        board = self.board
+        self.key = 0 if self.p1_turn else board.zobrist_turn
+        for i, c in enumerate(self.cells):
+            if c in ["1", "2"]:
+                self.key ^= board.zobrist_cells[c][i]
+        for n, owner in enumerate(self.owners):
+            if owner in ["1", "2"]:
+                self.key ^= board.zobrist_lines[owner][n]
+
+    def get_ley_lines(self, kind: int) -> list:
+        """
+        Return the ley-lines of one direction (0 for rows, 1 for down-left,
+        2 for down-right) as [owner, cell, cell, ...] lists.
+
+        >>> StonehengeState(True, 1).make_move('A').get_ley_lines(0)
+        [['1', '1', 'B'], ['@', 'C']]
+        """
+        k = self.length + 1
+        return [[self.owners[n]] + [self.cells[i] for i in self.board.lines[n]]
+                for n in range(kind * k, (kind + 1) * k)]
+
+    @property
+    def r(self) -> list:
+        """
+        The row ley-lines, as [owner, cell, cell, ...] lists.
+        """
+        return self.get_ley_lines(0)
+
+    @property
+    def dl(self) -> list:
+        """
+        The down-left ley-lines, as [owner, cell, cell, ...] lists.
+        """
+        return self.get_ley_lines(1)
+
+    @property
+    def dr(self) -> list:
+        """
+        The down-right ley-lines, as [owner, cell, cell, ...] lists.
+        """
+        return self.get_ley_lines(2)
+
+    @property
+    def state(self) -> list:
+        """
+        The ley-lines as [r, dl, dr].
+        """
+        return [self.r, self.dl, self.dr]
 
     def __str__(self) -> str:
         """
         Return a string representation of the current state of the game.
-        """
-        if (self.total / 3) - 1 == 1:
-            return """\
-      {}   {}
-     /   /
-{} - {} - {}
-     \\ / \\
-  {} - {}   {}
-       \\
-        {}""".format(self.dl[0][0], self.dl[1][0], self.r[0][0],
-                     self.r[0][1], self.r[0][2], self.r[1][0],
-                     self.r[1][1], self.dr[1][0], self.dr[0][0])
-        elif (self.total / 3) - 1 == 2:
-            return """\
-        {}   {}
-       /   /
-  {} - {} - {}   {}
-     / \\ / \\ /
-{} - {} - {} - {}
-     \\ / \\ / \\
-  {} - {} - {}   {}
-       \\   \\
-        {}   {}""".format(self.dl[0][0], self.dl[1][0], self.r[0][0],
-                          self.r[0][1], self.r[0][2], self.dl[2][0],
-                          self.r[1][0], self.r[1][1], self.r[1][2],
-                          self.r[1][3], self.r[2][0], self.r[2][1],
-                          self.r[2][2], self.dr[2][0], self.dr[0][0],
-                          self.dr[1][0])
-        elif (self.total / 3) - 1 == 3:
-            return """\
-          {}   {}
-         /   /
-    {} - {} - {}   {}
-       / \\ / \\ /
-  {} - {} - {} - {}   {}
-     / \\ / \\ / \\ /
-{} - {} - {} - {} - {}
-     \\ / \\ / \\ / \\
-  {} - {}   {}   {}   {}
-       \\   \\   \\
-        {}   {}   {}""".format(self.dl[0][0], self.dl[1][0], self.r[0][0],
-                               self.r[0][1], self.r[0][2], self.dl[2][0],
-                               self.r[1][0], self.r[1][1], self.r[1][2],
-                               self.r[1][3], self.dl[3][0], self.r[2][0],
-                               self.r[2][1], self.r[2][2], self.r[2][3],
-                               self.r[2][4], self.r[3][0], self.r[3][1],
-                               self.r[3][2], self.r[3][3], self.dr[3][0],
-                               self.dr[0][0], self.dr[1][0], self.dr[2][0])
-        elif (self.total / 3) - 1 == 4:
-            return """\
-            {}   {}
-           /   /
-      {} - {} - {}   {}
-         / \\ / \\ /
-    {} - {} - {} - {}   {}
-       / \\ / \\ / \\ /
-  {} - {} - {} - {} - {}   {}
-     / \\ / \\ / \\ / \\ /
-{} - {}   {}   {}   {}   {}
-     \\ / \\ / \\ / \\ / \\
-  {} - {}   {}   {}   {}   {}
-       \\   \\   \\   \\
-        {}   {}   {}   {}""".format(self.dl[0][0], self.dl[1][0], self.r[0][0],
-                                    self.r[0][1], self.r[0][2], self.dl[2][0],
-                                    self.r[1][0], self.r[1][1], self.r[1][2],
-                                    self.r[1][3], self.dl[3][0], self.r[2][0],
-                                    self.r[2][1], self.r[2][2], self.r[2][3],
-                                    self.r[2][4], self.dl[4][0], self.r[3][0],
-                                    self.r[3][1], self.r[3][2], self.r[3][3],
-                                    self.r[3][4], self.r[3][5], self.r[4][0],
-                                    self.r[4][1], self.r[4][2], self.r[4][3],
-                                    self.r[4][4], self.dr[4][0], self.dr[0][0],
-                                    self.dr[1][0], self.dr[2][0], self.dr[3][0])
-        return """\
-              {}   {}
+
+        >>> print(StonehengeState(True, 1).make_move('B'))
+              @   1
              /   /
-        {} - {} - {}   {}
-           / \\ / \\ /
-      {} - {} - {} - {}   {}
-         / \\ / \\ / \\ /
-    {} - {} - {} - {} - {}   {}
-       / \\ / \\ / \\ / \\ /
-  {} - {}   {}   {}   {}   {}   {}
-     / \\ / \\ / \\ / \\ / \\ /
-{} - {}   {}   {}   {}   {}   {}
-     \\ / \\ / \\ / \\ / \\ / \\
-  {} - {}   {}   {}   {}   {}   {}
-       \\   \\   \\   \\   \\
-        {}   {}   {}   {}   {}""".format(self.dl[0][0], self.dl[1][0],
-                                         self.r[0][0], self.r[0][1],
-                                         self.r[0][2], self.dl[2][0],
-                                         self.r[1][0], self.r[1][1],
-                                         self.r[1][2], self.r[1][3],
-                                         self.dl[3][0], self.r[2][0],
-                                         self.r[2][1], self.r[2][2],
-                                         self.r[2][3], self.r[2][4],
-                                         self.dl[4][0], self.r[3][0],
-                                         self.r[3][1], self.r[3][2],
-                                         self.r[3][3], self.r[3][4],
-                                         self.r[3][5], self.dl[5][0],
-                                         self.r[4][0], self.r[4][1],
-                                         self.r[4][2], self.r[4][3],
-                                         self.r[4][4], self.r[4][5],
-                                         self.r[4][6], self.r[5][0],
-                                         self.r[5][1], self.r[5][2],
-                                         self.r[5][3], self.r[5][4],
-                                         self.r[5][5], self.dr[5][0],
-                                         self.dr[0][0], self.dr[1][0],
-                                         self.dr[2][0], self.dr[3][0],
-                                         self.dr[4][0])
+        1 - A - 1
+             \\ / \\
+          @ - C   1
+               \\
+                @
+        """
+        return self.board.template.format(*self.cells, *self.owners)
 
     def get_possible_moves(self) -> list:
         """
         Return all possible moves that can be applied to this state.
         """
-        result = []
         if self.n_p1 < self.total / 2 and self.n_p2 < self.total / 2:
-            for l in self.r:
-                for c in l:
-                    append_lst(result, c)
-        return result
+            return self.unclaimed[:]
+        return []
 
     def make_move(self, move: Any) -> 'StonehengeState':
         """
         Return the GameState that results from applying move to this GameState.
+
+        The new state shares the board with self and gets its own copies of
+        the flat lists; only the ley-lines through the claimed cell are
+        recounted, and key changes by one XOR per change.
         """
-        current_state = copy.deepcopy(self.state)
+        new_state = copy.copy(self)
+        new_state.p1_turn = not self.p1_turn
+        new_state.key = self.key ^ self.board.zobrist_turn
+        i = self.board.index.get(move)
+        if i is None or self.cells[i] != move:
+            return new_state
         p = self.get_current_player_name()[1]
-        for l in current_state:
-            for i in l:
-                if move in i:
-                    i[i.index(move)] = p
-                    change_owner(i, p)
-        new_state = StonehengeState(not self.p1_turn, -1, current_state[0],
-                                    current_state[1], current_state[2])
+        new_state.cells = self.cells[:]
+        new_state.cells[i] = p
+        new_state.owners = self.owners[:]
+        new_state.claims = {"1": self.claims["1"][:],
+                            "2": self.claims["2"][:]}
+        new_state.unclaimed = self.unclaimed[:]
+        new_state.unclaimed.remove(move)
+        new_state.key ^= self.board.zobrist_cells[p][i]
+        counts = new_state.claims[p]
+        for n in self.board.cell_lines[i]:
+            counts[n] += 1
+            if (new_state.owners[n] == "@"
+                    and counts[n] * 2 >= self.board.sizes[n]):
+                new_state.owners[n] = p
+                new_state.key ^= self.board.zobrist_lines[p][n]
+                if p == "1":
+                    new_state.n_p1 += 1
+                else:
+                    new_state.n_p2 += 1
         return new_state
 
+    def apply_move(self, move: Any) -> Any:
+        """
+        Apply move to self in place, as make_move would to a copy, and
+        return the token for undo_move: the move, the index of its cell,
+        its position in unclaimed and the ley-lines it captured, or None
+        for an invalid move, which only passes the turn.
+
+        self changes its own lists, so it must not share them with another
+        state (as the shallow copies of __copy__ do).
+
+        >>> s = StonehengeState(True, 2).make_move('B')
+        >>> before = repr(s), s.key
+        >>> token = s.apply_move('A')
+        >>> s == StonehengeState(True, 2).make_move('B').make_move('A')
+        True
+        >>> s.undo_move(token)
+        >>> (repr(s), s.key) == before, s.unclaimed[:2]
+        (True, ['A', 'C'])
+        """
+        board = self.board
+        p = "1" if self.p1_turn else "2"
+        self.p1_turn = not self.p1_turn
+        key = self.key ^ board.zobrist_turn
+        i = board.index.get(move)
+        if i is None or self.cells[i] != move:
+            self.key = key
+            return None
+        self.cells[i] = p
+        unclaimed = self.unclaimed
+        j = unclaimed.index(move)
+        del unclaimed[j]
+        key ^= board.zobrist_cells[p][i]
+        counts = self.claims[p]
+        owners = self.owners
+        sizes = board.sizes
+        captured = []
+        for n in board.cell_lines[i]:
+            counts[n] += 1
+            if owners[n] == "@" and counts[n] * 2 >= sizes[n]:
+                owners[n] = p
+                key ^= board.zobrist_lines[p][n]
+                captured.append(n)
+        self.key = key
+        if captured:
+            if p == "1":
+                self.n_p1 += len(captured)
+            else:
+                self.n_p2 += len(captured)
+        return move, i, j, captured
+
+    def undo_move(self, token: Any) -> None:
+        """
+        Take back the move that apply_move returned token for.
+        """
+        board = self.board
+        self.p1_turn = not self.p1_turn
+        key = self.key ^ board.zobrist_turn
+        if token is None:
+            self.key = key
+            return
+        move, i, j, captured = token
+        p = "1" if self.p1_turn else "2"
+        self.cells[i] = move
+        self.unclaimed.insert(j, move)
+        key ^= board.zobrist_cells[p][i]
+        counts = self.claims[p]
+        for n in board.cell_lines[i]:
+            counts[n] -= 1
+        if captured:
+            owners = self.owners
+            lines = board.zobrist_lines[p]
+            for n in captured:
+                owners[n] = "@"
+                key ^= lines[n]
+            if p == "1":
+                self.n_p1 -= len(captured)
+            else:
+                self.n_p2 -= len(captured)
+        self.key = key
+
+    def __eq__(self, other: Any) -> bool:
+        """
+        Return whether self and other are the same position: the same board,
+        claims, captures and player to move.
+
+        >>> a = StonehengeState(True, 2).make_move('A').make_move('B')
+        >>> b = StonehengeState(True, 2).make_move('B').make_move('A')
+        >>> a == b, a == b.make_move('C')
+        (False, False)
+        >>> a == StonehengeState(True, 2).make_move('A').make_move('B')
+        True
+        """
+        return (type(self) == type(other) and self.key == other.key
+                and self.p1_turn == other.p1_turn
+                and self.length == other.length
+                and self.cells == other.cells and self.owners == other.owners)
+
+    def __hash__(self) -> int:
+        """
+        Return the Zobrist hash of self, so that states can be dict keys.
+
+        >>> s = StonehengeState(True, 2).make_move('A')
+        >>> t = StonehengeState.__new__(StonehengeState)
+        >>> t.__setstate__(s.__getstate__())
+        >>> hash(s) == hash(t), len({s, t})
+        (True, 1)
+        """
+        return hash(self.key)
+
+    def __copy__(self) -> 'StonehengeState':
+        """
+        Return a shallow copy of self that shares its lists.
+        """
+        new_state = StonehengeState.__new__(StonehengeState)
+        new_state.__dict__.update(self.__dict__)
+        return new_state
+
+    def __getstate__(self) -> tuple:
+        """
+        Return the compact form of self that pickle sends between
+        processes: whose turn it is, the side length, the owner of each
+        ley-line and the claimant ("1", "2" or "@") of each cell.
+
+        >>> StonehengeState(True, 1).make_move('A').__getstate__()
+        (False, 1, '1@1@1@', '1@@')
+        """
+        cells = "".join([c if c in ["1", "2"] else "@" for c in self.cells])
+        return self.p1_turn, self.length, "".join(self.owners), cells
+
+    def __setstate__(self, compact: tuple) -> None:
+        """
+        Rebuild self from the compact form made by __getstate__.
+
+        >>> s = StonehengeState(True, 2).make_move('A').make_move('G')
+        >>> t = StonehengeState.__new__(StonehengeState)
+        >>> t.__setstate__(s.__getstate__())
+        >>> repr(t) == repr(s), t.claims == s.claims
+        (True, True)
+        """
+        p1_turn, length, owners, cells = compact
+        self.__init__(p1_turn, length)
+        for i, claimant in enumerate(cells):
+            if claimant != "@":
+                self.cells[i] = claimant
+        self.owners = list(owners)
+        self.recount()
+
     def __repr__(self) -> Any:
         """
         Return a representation of this state (which can be used for
@@ -297,43 +393,397 @@ class StonehengeState(GameState):
         return "Current Player: {}\n" \
                "Current State:\n{}".format(self.get_current_player_name(), s)
 
+    def canonical_key(self) -> tuple:
+        """
+        Return a key shared by self and every position that is one of its
+        symmetric images on the board (see StonehengeBoard.get_symmetries).
+        Those positions all have the same value for the player to move.
+
+        >>> a = StonehengeState(True, 3).make_move('A')
+        >>> b = StonehengeState(True, 3).make_move('C')
+        >>> c = StonehengeState(True, 3).make_move('L')
+        >>> a.canonical_key() == b.canonical_key()
+        False
+        >>> a.canonical_key() == c.canonical_key()
+        True
+        """
+        marks = [c if c in ["1", "2"] else "@" for c in self.cells]
+        return self.p1_turn, min(
+            "".join([marks[i] for i in cell_order] +
+                    [self.owners[n] for n in line_order])
+            for cell_order, line_order in self.board.get_symmetries())
+
+    def get_captures(self, move: Any, player: str = None) -> list:
+        """
+        Return the ley-lines (as indices into owners) that player, "1" or
+        "2" (the current player by default), would capture by claiming the
+        unclaimed cell move.
+
+        >>> StonehengeState(True, 2).get_captures('A')
+        [0, 3]
+        """
+        if player is None:
+            player = self.get_current_player_name()[1]
+        board = self.board
+        counts = self.claims[player]
+        return [n for n in board.cell_lines[board.index[move]]
+                if self.owners[n] == "@"
+                and (counts[n] + 1) * 2 >= board.sizes[n]]
+
     def rough_outcome(self) -> float:
         """
         Return an estimate in interval [LOSE, WIN] of best outcome the current
         player can guarantee from state self.
+
+        Going through the moves in order, return 1 at the first move that
+        wins at once, or -1 at the first that leaves the opponent a winning
+        reply; otherwise 0.  Both questions are answered from the ley-line
+        claim counts, without making any move.
         """
-        if self.get_possible_moves() == []:
+        moves = self.get_possible_moves()
+        if moves == []:
             return -1
-        for move_1 in self.get_possible_moves():
-            new_state_1 = self.make_move(move_1)
-            if new_state_1.get_possible_moves() == []:
+        p = self.get_current_player_name()[1]
+        if p == "1":
+            q, n_p, n_q = "2", self.n_p1, self.n_p2
+        else:
+            q, n_p, n_q = "1", self.n_p2, self.n_p1
+        # The number of ley-lines each player still needs to win
+        need_p = (self.total + 1) // 2 - n_p
+        need_q = (self.total + 1) // 2 - n_q
+        # The cells the opponent could win with right now.  Our move can
+        # only take ley-lines away from these, never add new threats.
+        threats = []
+        for move in moves:
+            lines = self.get_captures(move, q)
+            if len(lines) >= need_q:
+                threats.append((move, lines))
+        for move in moves:
+            captured = self.get_captures(move, p)
+            if len(captured) >= need_p or len(moves) == 1:
                 return 1
-            else:
-                for move_2 in new_state_1.get_possible_moves():
-                    new_state_2 = new_state_1.make_move(move_2)
-                    if new_state_2.get_possible_moves() == []:
-                        return -1
+            if len(moves) == 2:
+                return -1
+            for reply, lines in threats:
+                if reply != move and len([n for n in lines
+                                          if n not in captured]) >= need_q:
+                    return -1
         return 0
 
 
-def change_owner(i: list, p: str) -> None:
+class StonehengeBoard:
     """
-    Change the owner of lay-line if need.
+    The geometry of a stonehenge board of one side length, which never
+    changes during a game and so is shared by all of its states.  Boards of
+    any side length can be generated.
+
+    length - the side length of the board
+    labels - the label of each cell, in the order moves are listed
+    index - map from a cell label to its index in labels
+    lines - the cell indices of each ley-line: the rows, then the
+            down-left ley-lines, then the down-right ley-lines
+    sizes - the number of cells in each ley-line
+    cell_lines - for each cell, the indices of the ley-lines through it
+    zobrist_cells - for "1" and "2", a random 64-bit number for each cell
+    zobrist_lines - for "1" and "2", a random 64-bit number for each
+                    ley-line
+    zobrist_turn - a random 64-bit number for p2 being the player to move
+    template - the drawing of the board as a format string, with field i
+               for cell i and field len(labels) + n for ley-line n
     """
-    count = 0
-    for e in i[1:]:
-        if e == p:
-            count += 1
-    if count >= (len(i) - 1) / 2 and i[0] == "@":
-        i[0] = p
+    length: int
+    labels: list
+    index: dict
+    lines: list
+    sizes: list
+    cell_lines: list
+    zobrist_cells: dict
+    zobrist_lines: dict
+    zobrist_turn: int
+    template: str
+
+    def __init__(self, length: int) -> None:
+        """
+        Build the geometry of the board with side length length.
+
+        >>> b = StonehengeBoard(1)
+        >>> b.labels, b.lines
+        (['A', 'B', 'C'], [(0, 1), (2,), (0,), (1, 2), (0, 2), (1,)])
+        >>> b.cell_lines
+        [(0, 2, 4), (0, 3, 5), (1, 3, 4)]
+        """
+        row_sizes = [i + 2 for i in range(length)] + [length]
+        first = [sum(row_sizes[:i]) for i in range(length + 1)]
+        self.length = length
+        self.labels = [cell_label(i) for i in range(sum(row_sizes))]
+        self.index = {c: i for i, c in enumerate(self.labels)}
+        self.lines = [tuple(first[row] + position
+                            for row, position in line)
+                      for line in generate_ley_lines(length)]
+        self.sizes = [len(line) for line in self.lines]
+        cell_lines = [[] for _ in self.labels]
+        for n, line in enumerate(self.lines):
+            for i in line:
+                cell_lines[i].append(n)
+        self.cell_lines = [tuple(n) for n in cell_lines]
+        # Seeded by side length, so keys are the same in every process
+        rng = random.Random(ZOBRIST_SEED + length)
+        self.zobrist_cells = {p: [rng.getrandbits(64) for _ in self.labels]
+                              for p in ["1", "2"]}
+        self.zobrist_lines = {p: [rng.getrandbits(64) for _ in self.lines]
+                              for p in ["1", "2"]}
+        self.zobrist_turn = rng.getrandbits(64)
+        self.template = draw_template(
+            length, self.lines, max(len(c) for c in self.labels))
+        self._symmetries = None
+
+    def get_symmetries(self) -> list:
+        """
+        Return the symmetries of this board, found the first time they are
+        asked for, as (cell_order, line_order) pairs: the image of a board
+        lists the cells (and ley-lines) at the indices in cell_order (and
+        line_order), in that order.  The identity comes first.
 
+        >>> [len(get_board(n).get_symmetries()) for n in [1, 2, 3, 4]]
+        [6, 12, 6, 6]
+        >>> get_board(3).get_symmetries()[0][0] == tuple(range(12))
+        True
+        """
+        if self._symmetries is None:
+            index = {frozenset(line): n for n, line in enumerate(self.lines)}
+            self._symmetries = []
+            for image in find_symmetries(self.lines, len(self.labels)):
+                cell_order = [0] * len(image)
+                for i, j in enumerate(image):
+                    cell_order[j] = i
+                line_image = [index[frozenset(image[i] for i in line)]
+                              for line in self.lines]
+                line_order = [0] * len(line_image)
+                for n, m in enumerate(line_image):
+                    line_order[m] = n
+                self._symmetries.append((tuple(cell_order),
+                                         tuple(line_order)))
+        return self._symmetries
 
-def append_lst(lst: list, p: str) -> None:
+
+def generate_ley_lines(length: int) -> list:
+    """
+    Return the ley-lines of the board with side length length as lists of
+    (row, position) cells: the rows, then the down-left ley-lines, then the
+    down-right ley-lines, each group in the order it is drawn.
+
+    Rows 0 to length - 1 have 2, 3, ..., length + 1 cells and the last row
+    has length cells, tucked under the row above it.  Down-left ley-line j
+    takes position j of every row above the last and ends at position
+    j - 1 of the last row; down-right ley-line d (from length - 1 down to
+    -1) takes the cells with row - position == d and ends at position
+    length - 1 - d of the last row.
+
+    >>> generate_ley_lines(1)[2:4]
+    [[(0, 0)], [(0, 1), (1, 0)]]
     """
-    Append p into lst if p is alpha.
+    rows = [[(i, j) for j in range(i + 2)] for i in range(length)]
+    rows.append([(length, j) for j in range(length)])
+    down_left = []
+    for j in range(length + 1):
+        line = [(i, j) for i in range(max(j - 1, 0), length)]
+        if 0 < j:
+            line.append((length, j - 1))
+        down_left.append(line)
+    down_right = []
+    for d in range(length - 1, -2, -1):
+        line = [(i, i - d) for i in range(max(d, 0), length)]
+        if 0 <= d:
+            line.append((length, length - 1 - d))
+        down_right.append(line)
+    return rows + down_left + down_right
+
+
+def draw_template(length: int, lines: list, width: int = 1) -> str:
+    """
+    Return the drawing of the board with side length length and ley-lines
+    lines (as cell indices, in the order of StonehengeBoard.lines) as a
+    format string: field i is cell i, and field m + n is the owner of
+    ley-line n, where m is the number of cells.  Every field followed by
+    more of its line is padded to width, the length of the longest label.
+
+    With h = width + 1, row i is indented h * (length - 1 - i) columns,
+    except the last row, which is indented h; within a row, cells are 2 * h
+    columns apart.  Each diagonal ley-line's owner sits h columns right of
+    the cell it points at.
+
+    >>> print(draw_template(1, [(0, 1), (2,), (0,), (1, 2), (0, 2), (1,)]))
+          {5}   {6}
+         /   /
+    {3} - {0} - {1}
+         \\ / \\
+      {4} - {2}   {8}
+           \\
+            {7}
+    >>> wide = draw_template(1, [(0, 1), (2,), (0,), (1, 2), (0, 2), (1,)],
+    ...                      2)
+    >>> print(wide.format("AA", "B", "CC", "1", "@", "2", "@", "1", "@"))
+             2     @
+            /     /
+    1  -  AA -  B
+            \\  /  \\
+       @  -  CC    @
+               \\
+                1
+    """
+    m = sum(len(line) for line in lines[:length + 1])
+    half = width + 1
+    step = 2 * half
+    gap = " - " + " " * (step - width - 3)
+    space = " " * (step - width)
+
+    def field(n: int, padded: bool = True) -> str:
+        """
+        Return format field n, padded to width if padded.
+        """
+        if padded and width > 1:
+            return "{" + str(n) + ":<" + str(width) + "}"
+        return "{" + str(n) + "}"
+
+    def cells(row: int, padded: bool = True) -> str:
+        """
+        Return row's owner followed by its cells, joined by " - ", with the
+        last cell padded if padded.
+        """
+        fields = [field(m + row)] + [field(i) for i in lines[row][:-1]]
+        return gap.join(fields + [field(lines[row][-1], padded)])
+
+    def marks(columns: list) -> str:
+        """
+        Return a line with each (column, character) pair of columns drawn.
+        """
+        line = [" "] * (max(c for c, _ in columns) + 1)
+        for c, char in columns:
+            line[c] = char
+        return "".join(line)
+
+    dl = m + length + 1
+    dr = m + 2 * (length + 1)
+    top = half * (length - 1) + step + half
+    drawing = [" " * top + field(dl) + space + field(dl + 1, False),
+               marks([(top - 1, "/"), (top + step - 1, "/")])]
+    for row in range(length):
+        indent = half * (length - 1 - row)
+        # The cells of this row are at columns indent + step, ...
+        columns = range(indent + step, indent + step * (row + 3), step)
+        if row < length - 1:
+            drawing.append(" " * indent + cells(row) + space +
+                           field(dl + row + 2, False))
+            drawing.append(marks([(c + d, char) for c in columns
+                                  for d, char in [(-1, "/"),
+                                                  (width, "\\")]] +
+                                 [(columns[-1] + step - 1, "/")]))
+        else:
+            drawing.append(cells(row, False))
+            below = [c + half for c in columns[:-1]]
+            drawing.append(marks([(c + d, char) for c in below
+                                  for d, char in [(-1, "\\"),
+                                                  (width, "/")]] +
+                                 [(columns[-1] + width, "\\")]))
+    drawing.append(" " * half + cells(length) + space +
+                   field(dr + length, False))
+    drawing.append(marks([(c + width, "\\") for c in below]))
+    drawing.append(" " * (below[0] + half) + space.join(
+        [field(dr + d) for d in range(length - 1)] +
+        [field(dr + length - 1, False)]))
+    return "\n".join(drawing)
+
+
+def find_symmetries(lines: list, size: int) -> list:
+    """
+    Return every permutation of the cells 0 to size - 1 which maps each
+    ley-line in lines onto a ley-line, as a tuple of the image of each cell.
+    Since the rules only depend on which cells share a ley-line, such a
+    permutation maps every position to one of the same value.
+
+    The permutations are found by backtracking: cells are mapped in order,
+    each only to a cell with ley-lines of the same sizes through it, and a
+    partial map is dropped as soon as the mapped cells of some ley-line do
+    not all lie on one ley-line of the same size.
+
+    >>> find_symmetries([(0, 1), (1, 2), (2,)], 3)
+    [(0, 1, 2)]
+    >>> find_symmetries([(0, 1), (1, 2)], 3)
+    [(0, 1, 2), (2, 1, 0)]
+    """
+    through = [[] for _ in range(size)]
+    for n, line in enumerate(lines):
+        for i in line:
+            through[i].append(n)
+    shapes = [sorted(len(lines[n]) for n in through[i]) for i in range(size)]
+    found = []
+    image = [None] * size
+    used = [False] * size
+
+    def fits(i: int) -> bool:
+        """
+        Return whether the ley-lines through cell i are still mapped onto
+        ley-lines of the same size, as far as image goes.
+        """
+        for n in through[i]:
+            mapped = [image[c] for c in lines[n] if image[c] is not None]
+            common = set(through[mapped[0]])
+            for c in mapped[1:]:
+                common.intersection_update(through[c])
+            if not any(len(lines[m]) == len(lines[n]) for m in common):
+                return False
+        return True
+
+    def extend(i: int) -> None:
+        """
+        Add to found every completion of image, which maps cells 0 to i - 1.
+        """
+        if i == size:
+            found.append(tuple(image))
+            return
+        for j in range(size):
+            if not used[j] and shapes[j] == shapes[i]:
+                image[i] = j
+                used[j] = True
+                if fits(i):
+                    extend(i + 1)
+                image[i] = None
+                used[j] = False
+
+    extend(0)
+    return found
+
+
+def cell_label(i: int) -> str:
+    """
+    Return the label of cell i: A to Z, then AA, AB, and so on.
+
+    >>> cell_label(0), cell_label(25), cell_label(26), cell_label(53)
+    ('A', 'Z', 'AA', 'BB')
+    """
+    label = ""
+    i += 1
+    while i > 0:
+        i, letter = divmod(i - 1, 26)
+        label = chr(ord("A") + letter) + label
+    return label
+
+
+_BOARDS = {}
+ZOBRIST_SEED = 148
+
+
+def get_board(length: int) -> StonehengeBoard:
+    """
+    Return the StonehengeBoard of side length length, building it the first
+    time it is asked for.
+
+    >>> get_board(2) is get_board(2)
+    True
     """
-    if p.isalpha():
-        lst.append(p)
+    if length not in _BOARDS:
+        _BOARDS[length] = StonehengeBoard(length)
+    return _BOARDS[length]
 
 
 if __name__ == "__main__":
@@ -0,0 +1,209 @@
+"""
+Scoring many stonehenge positions at once with NumPy.
+
+A batch of n positions of one side length is encoded as three arrays:
+cells, an n by (number of cells) uint8 matrix holding 0 for an unclaimed
+cell and 1 or 2 for a cell claimed by that player; owners, an n by (number
+of ley-lines) uint8 matrix in the same code for the ley-lines; and p1_turn,
+a bool vector.  (The owners cannot be worked out from the cells, because a
+ley-line belongs to whoever reached half of it first.)  Every question is
+then answered for the whole batch with matrix products against the board's
+cell by ley-line incidence matrix, instead of a Python loop per position.
+
+This module needs NumPy, which the rest of the assignment does not.
+
+NOTE: You do not have to run python-ta on this file.
+"""
+from typing import Any
+import numpy as np
+from stonehenge import get_board
+
+
+class BatchTables:
+    """
+    The precomputed matrices of a stonehenge board of one side length.
+
+    length - the side length of the board
+    incidence - the (cells, ley-lines) matrix with a 1 where the ley-line
+                goes through the cell
+    sizes - the number of cells in each ley-line
+    half - the number of ley-lines a player needs to win
+    shared - the (cells * cells, ley-lines) matrix with a 1 in row
+             i * cells + j where the ley-line goes through both cells i
+             and j
+    """
+    length: int
+    incidence: Any
+    sizes: Any
+    half: int
+    shared: Any
+
+    def __init__(self, length: int) -> None:
+        """
+        Build the matrices for a board with side length length.
+
+        >>> t = BatchTables(1)
+        >>> t.incidence.tolist()
+        [[1, 0, 1, 0, 1, 0], [1, 0, 0, 1, 0, 1], [0, 1, 0, 1, 1, 0]]
+        >>> t.sizes.tolist(), t.half
+        ([2, 1, 1, 2, 2, 1], 3)
+        """
+        board = get_board(length)
+        cells, lines = len(board.labels), len(board.lines)
+        self.length = length
+        self.incidence = np.zeros((cells, lines), dtype=np.int16)
+        for n, line in enumerate(board.lines):
+            self.incidence[list(line), n] = 1
+        self.sizes = np.array(board.sizes, dtype=np.int16)
+        self.half = (lines + 1) // 2
+        self.shared = (self.incidence[:, None, :] *
+                       self.incidence[None, :, :]).reshape(cells * cells,
+                                                           lines)
+
+
+_TABLES = {}
+
+
+def get_tables(length: int) -> BatchTables:
+    """
+    Return the BatchTables for side length length, building them the first
+    time they are needed.
+    """
+    if length not in _TABLES:
+        _TABLES[length] = BatchTables(length)
+    return _TABLES[length]
+
+
+def encode(states: list) -> tuple:
+    """
+    Return the cells, owners and p1_turn arrays of states, a non-empty list
+    of StonehengeStates of one side length.
+
+    >>> from stonehenge import StonehengeState
+    >>> cells, owners, p1_turn = encode([StonehengeState(True, 1)
+    ...                                  .make_move('B')])
+    >>> cells.tolist(), owners.tolist(), p1_turn.tolist()
+    ([[0, 1, 0]], [[1, 0, 0, 1, 0, 1]], [False])
+    """
+    code = {"1": 1, "2": 2}
+    cells = np.array([[code.get(c, 0) for c in s.cells] for s in states],
+                     dtype=np.uint8)
+    owners = np.array([[code.get(o, 0) for o in s.owners] for s in states],
+                      dtype=np.uint8)
+    p1_turn = np.array([s.p1_turn for s in states], dtype=bool)
+    return cells, owners, p1_turn
+
+
+def line_claims(tables: BatchTables, cells: Any) -> tuple:
+    """
+    Return two (n, ley-lines) matrices: the number of cells player 1, and
+    player 2, has claimed in each ley-line of each position.
+    """
+    p1 = (cells == 1).astype(np.int16) @ tables.incidence
+    p2 = (cells == 2).astype(np.int16) @ tables.incidence
+    return p1, p2
+
+
+def captured(owners: Any) -> tuple:
+    """
+    Return two vectors: the number of ley-lines player 1, and player 2, has
+    captured in each position.
+    """
+    return (owners == 1).sum(axis=1), (owners == 2).sum(axis=1)
+
+
+def is_over(tables: BatchTables, owners: Any) -> Any:
+    """
+    Return a bool vector telling which positions are over, because one
+    player has captured at least half of the ley-lines.
+    """
+    p1, p2 = captured(owners)
+    return (p1 >= tables.half) | (p2 >= tables.half)
+
+
+def _threats(tables: BatchTables, cells: Any, owners: Any,
+             p1_turn: Any) -> tuple:
+    """
+    Return, for the player to move (p) and the opponent (q): the ley-lines
+    each would capture by claiming one more of their cells, as bool
+    matrices, and the number of ley-lines each still needs to win.
+    """
+    p1, p2 = line_claims(tables, cells)
+    n_p1, n_p2 = captured(owners)
+    turn = p1_turn[:, None]
+    claims_p = np.where(turn, p1, p2)
+    claims_q = np.where(turn, p2, p1)
+    free_line = owners == 0
+    ready_p = free_line & ((claims_p + 1) * 2 >= tables.sizes)
+    ready_q = free_line & ((claims_q + 1) * 2 >= tables.sizes)
+    need_p = tables.half - np.where(p1_turn, n_p1, n_p2)
+    need_q = tables.half - np.where(p1_turn, n_p2, n_p1)
+    return ready_p, ready_q, need_p, need_q
+
+
+def winning_moves(tables: BatchTables, cells: Any, owners: Any,
+                  p1_turn: Any) -> Any:
+    """
+    Return an (n, cells) bool matrix telling which cells the player to move
+    in each position can claim to win at once.
+
+    >>> from stonehenge import StonehengeState
+    >>> s = StonehengeState(True, 2).make_move('D').make_move('A')
+    >>> t = get_tables(2)
+    >>> winning_moves(t, *encode([s])).nonzero()[1].tolist()
+    []
+    >>> winning_moves(t, *encode([s.make_move('B')])).nonzero()[1].tolist()
+    [6]
+    """
+    ready_p, _, need_p, _ = _threats(tables, cells, owners, p1_turn)
+    gains = ready_p.astype(np.int16) @ tables.incidence.T
+    playable = (cells == 0) & ~is_over(tables, owners)[:, None]
+    return playable & (gains >= need_p[:, None])
+
+
+def rough_outcomes(tables: BatchTables, cells: Any, owners: Any,
+                   p1_turn: Any) -> Any:
+    """
+    Return an int8 vector with StonehengeState.rough_outcome() of every
+    position: -1 for a position that is over, otherwise, going through the
+    unclaimed cells in order, 1 at the first that wins at once (or is the
+    only one), -1 at the first that leaves the opponent a winning reply
+    (every one does if there are only two), and 0 if there is neither.
+
+    The replies are checked for every pair of unclaimed cells at once, so
+    this takes time and memory in proportion to n * cells ** 2.
+
+    >>> from stonehenge import StonehengeState
+    >>> s = StonehengeState(True, 2)
+    >>> states = [s, s.make_move('A'), s.make_move('A').make_move('E')]
+    >>> rough_outcomes(get_tables(2), *encode(states)).tolist()
+    [0, -1, 0]
+    """
+    n, size = cells.shape
+    ready_p, ready_q, need_p, need_q = _threats(tables, cells, owners,
+                                                p1_turn)
+    free = cells == 0
+    moves = free.sum(axis=1)
+    over = is_over(tables, owners)
+    gains_p = ready_p.astype(np.int16) @ tables.incidence.T
+    gains_q = ready_q.astype(np.int16) @ tables.incidence.T
+    wins = free & ((gains_p >= need_p[:, None]) | (moves == 1)[:, None])
+    # lost[k, m, r]: the ley-lines the opponent would capture with reply r
+    # that move m captures first
+    both = (ready_p & ready_q).astype(np.int16)
+    lost = (both @ tables.shared.T).reshape(n, size, size)
+    replies = (gains_q[:, None, :] - lost) >= need_q[:, None, None]
+    replies &= free[:, None, :]
+    replies &= ~np.eye(size, dtype=bool)[None, :, :]
+    loses = free & (replies.any(axis=2) | (moves == 2)[:, None])
+    decisive = (wins | loses) & ~over[:, None]
+    first = decisive.argmax(axis=1)
+    outcome = np.where(wins[np.arange(n), first], 1, -1).astype(np.int8)
+    outcome[~decisive.any(axis=1)] = 0
+    outcome[over] = -1
+    return outcome
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,69 @@
+import random
+import unittest
+
+from stonehenge import StonehengeState
+
+try:
+    import stonehenge_batch
+except ImportError:  # NumPy is not installed
+    stonehenge_batch = None
+
+
+def random_states(length, n, seed):
+    rng = random.Random(seed)
+    states = []
+    for _ in range(n):
+        state = StonehengeState(rng.random() < 0.5, length)
+        for _ in range(rng.randrange(len(state.cells) + 1)):
+            if state.get_possible_moves() == []:
+                break
+            state = state.make_move(rng.choice(state.get_possible_moves()))
+        states.append(state)
+    return states
+
+
+@unittest.skipIf(stonehenge_batch is None, "NumPy is not installed")
+class StonehengeBatchUnitTests(unittest.TestCase):
+    def test_claims_and_over(self):
+        for length in range(1, 6):
+            states = random_states(length, 100, length)
+            tables = stonehenge_batch.get_tables(length)
+            cells, owners, p1_turn = stonehenge_batch.encode(states)
+            p1, p2 = stonehenge_batch.line_claims(tables, cells)
+            self.assertEqual(p1.tolist(), [s.claims["1"] for s in states])
+            self.assertEqual(p2.tolist(), [s.claims["2"] for s in states])
+            n_p1, n_p2 = stonehenge_batch.captured(owners)
+            self.assertEqual(n_p1.tolist(), [s.n_p1 for s in states])
+            self.assertEqual(n_p2.tolist(), [s.n_p2 for s in states])
+            self.assertEqual(
+                stonehenge_batch.is_over(tables, owners).tolist(),
+                [s.get_possible_moves() == [] for s in states])
+
+    def test_winning_moves(self):
+        for length in range(1, 5):
+            states = random_states(length, 100, 10 + length)
+            tables = stonehenge_batch.get_tables(length)
+            wins = stonehenge_batch.winning_moves(
+                tables, *stonehenge_batch.encode(states))
+            for state, row in zip(states, wins.tolist()):
+                expected = []
+                for move in state.get_possible_moves():
+                    after = state.make_move(move)
+                    if after.get_possible_moves() == []:
+                        expected.append(move)
+                self.assertEqual([state.board.labels[i]
+                                  for i, win in enumerate(row) if win],
+                                 expected)
+
+    def test_rough_outcomes_match(self):
+        for length in range(1, 6):
+            states = random_states(length, 300, 20 + length)
+            tables = stonehenge_batch.get_tables(length)
+            outcomes = stonehenge_batch.rough_outcomes(
+                tables, *stonehenge_batch.encode(states))
+            self.assertEqual(outcomes.tolist(),
+                             [s.rough_outcome() for s in states])
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,263 @@
+"""
+A bitboard implementation of the stonehenge game state.
+
+Each player's claimed cells are kept in one integer mask and each player's
+captured ley-lines in another, so a move only has to look at the (at most
+three) ley-lines through the claimed cell.
+"""
+from typing import Any
+from game_state import GameState
+from stonehenge import StonehengeGame, StonehengeState, get_board
+
+
+class BitboardTables:
+    """
+    The precomputed geometry of a stonehenge board of one side length.
+
+    length - the side length of the board
+    cells - the cell labels, in the order get_possible_moves() returns them
+    index - map from a cell label to its bit position
+    lines - the cell labels of each ley-line (rows, down-left, down-right)
+    line_masks - the cell mask of each ley-line
+    line_sizes - the number of cells in each ley-line
+    incidence - for each cell, the indices of the ley-lines through it
+    """
+    length: int
+    cells: list
+    index: dict
+    lines: list
+    line_masks: list
+    line_sizes: list
+    incidence: list
+
+    def __init__(self, length: int) -> None:
+        """
+        Build the tables for a board with side length length from its
+        StonehengeBoard, sharing the board's lists.
+
+        >>> t = BitboardTables(1)
+        >>> t.cells
+        ['A', 'B', 'C']
+        >>> t.incidence[t.index['A']]
+        (0, 2, 4)
+        """
+        board = get_board(length)
+        self.length = length
+        self.cells = board.labels
+        self.index = board.index
+        self.lines = [[board.labels[i] for i in line] for line in board.lines]
+        self.line_masks = [sum(1 << i for i in line) for line in board.lines]
+        self.line_sizes = board.sizes
+        self.incidence = board.cell_lines
+
+
+_TABLES = {}
+
+
+def get_tables(length: int) -> BitboardTables:
+    """
+    Return the shared BitboardTables for side length length, building them
+    the first time they are asked for.
+
+    >>> get_tables(2) is get_tables(2)
+    True
+    """
+    if length not in _TABLES:
+        _TABLES[length] = BitboardTables(length)
+    return _TABLES[length]
+
+
+def count_bits(n: int) -> int:
+    """
+    Return the number of set bits in n.
+
+    >>> count_bits(0b1011)
+    3
+    """
+    return bin(n).count("1")
+
+
+class StonehengeBitboardState(GameState):
+    """
+    The state of a stonehenge game, stored as integer bitmasks.
+
+    length - the side length of the board
+    tables - the geometry shared by every state with this side length
+    cells_p1, cells_p2 - masks of the cells claimed by each player
+    lines_p1, lines_p2 - masks of the ley-lines captured by each player
+    """
+    length: int
+    tables: BitboardTables
+    cells_p1: int
+    cells_p2: int
+    lines_p1: int
+    lines_p2: int
+
+    def __init__(self, is_p1_turn: bool, length: int, cells_p1: int = 0,
+                 cells_p2: int = 0, lines_p1: int = 0,
+                 lines_p2: int = 0) -> None:
+        """
+        Initialize this game state and set the current player based on
+        is_p1_turn.
+
+        >>> s = StonehengeBitboardState(True, 1)
+        >>> s.get_possible_moves()
+        ['A', 'B', 'C']
+        """
+        super().__init__(is_p1_turn)
+        self.length = length
+        self.tables = get_tables(length)
+        self.cells_p1 = cells_p1
+        self.cells_p2 = cells_p2
+        self.lines_p1 = lines_p1
+        self.lines_p2 = lines_p2
+
+    @classmethod
+    def from_state(cls, state: StonehengeState) -> 'StonehengeBitboardState':
+        """
+        Return the bitboard equivalent of the list-based state.
+
+        >>> s = StonehengeState(True, 2).make_move('A')
+        >>> b = StonehengeBitboardState.from_state(s)
+        >>> b.get_possible_moves()
+        ['B', 'C', 'D', 'E', 'F', 'G']
+        """
+        length = len(state.r) - 1
+        tables = get_tables(length)
+        masks = {"1": [0, 0], "2": [0, 0]}
+        for n, line in enumerate(state.r + state.dl + state.dr):
+            if line[0] in masks:
+                masks[line[0]][1] |= 1 << n
+            for label, value in zip(tables.lines[n], line[1:]):
+                if value in masks:
+                    masks[value][0] |= 1 << tables.index[label]
+        return cls(state.p1_turn, length, masks["1"][0], masks["2"][0],
+                   masks["1"][1], masks["2"][1])
+
+    def to_state(self) -> StonehengeState:
+        """
+        Return the list-based StonehengeState equivalent to this state.
+
+        >>> b = StonehengeBitboardState(True, 1).make_move('A')
+        >>> b.to_state().r
+        [['1', '1', 'B'], ['@', 'C']]
+        """
+        lines = []
+        for n, line in enumerate(self.tables.lines):
+            owner = "@"
+            if self.lines_p1 >> n & 1:
+                owner = "1"
+            elif self.lines_p2 >> n & 1:
+                owner = "2"
+            lst = [owner]
+            for c in line:
+                bit = 1 << self.tables.index[c]
+                if self.cells_p1 & bit:
+                    lst.append("1")
+                elif self.cells_p2 & bit:
+                    lst.append("2")
+                else:
+                    lst.append(c)
+            lines.append(lst)
+        k = self.length + 1
+        return StonehengeState(self.p1_turn, -1, lines[:k], lines[k:2 * k],
+                               lines[2 * k:])
+
+    def __str__(self) -> str:
+        """
+        Return a string representation of the current state of the game.
+        """
+        return str(self.to_state())
+
+    def get_possible_moves(self) -> list:
+        """
+        Return all possible moves that can be applied to this state.
+
+        >>> s = StonehengeBitboardState(True, 1).make_move('A')
+        >>> s.get_possible_moves()
+        []
+        """
+        total = len(self.tables.lines)
+        if (count_bits(self.lines_p1) * 2 >= total
+                or count_bits(self.lines_p2) * 2 >= total):
+            return []
+        taken = self.cells_p1 | self.cells_p2
+        return [c for i, c in enumerate(self.tables.cells)
+                if not taken >> i & 1]
+
+    def make_move(self, move: Any) -> 'StonehengeBitboardState':
+        """
+        Return the GameState that results from applying move to this GameState.
+
+        Only the ley-lines through the claimed cell are examined.
+        """
+        tables = self.tables
+        cells_p1, cells_p2 = self.cells_p1, self.cells_p2
+        lines_p1, lines_p2 = self.lines_p1, self.lines_p2
+        i = tables.index.get(move)
+        if i is not None and not (cells_p1 | cells_p2) >> i & 1:
+            if self.p1_turn:
+                cells_p1 |= 1 << i
+                mine, captured = cells_p1, lines_p1
+            else:
+                cells_p2 |= 1 << i
+                mine, captured = cells_p2, lines_p2
+            owned = lines_p1 | lines_p2
+            for n in tables.incidence[i]:
+                if (not owned >> n & 1 and
+                        count_bits(mine & tables.line_masks[n]) * 2
+                        >= tables.line_sizes[n]):
+                    captured |= 1 << n
+            if self.p1_turn:
+                lines_p1 = captured
+            else:
+                lines_p2 = captured
+        return StonehengeBitboardState(not self.p1_turn, self.length,
+                                       cells_p1, cells_p2, lines_p1, lines_p2)
+
+    def __repr__(self) -> Any:
+        """
+        Return a representation of this state (which can be used for
+        equality testing).
+        """
+        return "Current Player: {}\n" \
+               "Current State:\n{}".format(self.get_current_player_name(),
+                                           self.__str__())
+
+    def rough_outcome(self) -> float:
+        """
+        Return an estimate in interval [LOSE, WIN] of best outcome the current
+        player can guarantee from state self.
+        """
+        if self.get_possible_moves() == []:
+            return -1
+        for move_1 in self.get_possible_moves():
+            new_state_1 = self.make_move(move_1)
+            if new_state_1.get_possible_moves() == []:
+                return 1
+            for move_2 in new_state_1.get_possible_moves():
+                new_state_2 = new_state_1.make_move(move_2)
+                if new_state_2.get_possible_moves() == []:
+                    return -1
+        return 0
+
+
+class StonehengeBitboardGame(StonehengeGame):
+    """
+    A stonehenge game played on StonehengeBitboardState.
+    """
+
+    def __init__(self, p1_starts: bool) -> None:
+        """
+        Initialize this Game, using p1_starts to find who the first player is.
+        """
+        super().__init__(p1_starts)
+        self.current_state = StonehengeBitboardState.from_state(
+            self.current_state)
+
+
+if __name__ == "__main__":
+    from python_ta import check_all
+    check_all(config="a2_pyta.txt")
+    import doctest
+    doctest.testmod()
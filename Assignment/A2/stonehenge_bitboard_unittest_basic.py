@@ -0,0 +1,68 @@
+"""
+Unittests cross-checking StonehengeBitboardState against StonehengeState.
+
+Random games are played on both representations side by side, and every
+observable part of the GameState API must agree after every move.
+"""
+import random
+import unittest
+
+from stonehenge import StonehengeState
+from stonehenge_bitboard import StonehengeBitboardState
+
+
+class StonehengeBitboardUnitTests(unittest.TestCase):
+    def assert_same_state(self, expected, actual):
+        """
+        Assert that the list-based state expected and the bitboard state
+        actual are indistinguishable through the GameState API.
+        """
+        self.assertEqual(expected.get_possible_moves(),
+                         actual.get_possible_moves())
+        self.assertEqual(expected.get_current_player_name(),
+                         actual.get_current_player_name())
+        self.assertEqual(str(expected), str(actual))
+        self.assertEqual(repr(expected), repr(actual))
+
+    def test_initial_states(self):
+        """
+        Test that a fresh bitboard state matches a fresh list-based state
+        for every supported side length.
+        """
+        for length in range(1, 6):
+            self.assert_same_state(StonehengeState(True, length),
+                                   StonehengeBitboardState(True, length))
+
+    def test_random_games(self):
+        """
+        Test that random games agree move by move, including rough_outcome,
+        which the bitboard still computes by trying every move and reply.
+        """
+        rng = random.Random(148)
+        for length in range(1, 6):
+            for _ in range(10):
+                expected = StonehengeState(rng.random() < 0.5, length)
+                actual = StonehengeBitboardState(expected.p1_turn, length)
+                while expected.get_possible_moves() != []:
+                    self.assertEqual(expected.rough_outcome(),
+                                     actual.rough_outcome())
+                    move = rng.choice(expected.get_possible_moves())
+                    expected = expected.make_move(move)
+                    actual = actual.make_move(move)
+                    self.assert_same_state(expected, actual)
+
+    def test_round_trip(self):
+        """
+        Test that converting a list-based state to a bitboard and back
+        gives the same board.
+        """
+        state = StonehengeState(False, 3)
+        for move in ['K', 'A', 'C', 'B', 'F']:
+            state = state.make_move(move)
+        bitboard = StonehengeBitboardState.from_state(state)
+        self.assert_same_state(state, bitboard)
+        self.assertEqual(str(state), str(bitboard.to_state()))
+
+
+if __name__ == "__main__":
+    unittest.main()
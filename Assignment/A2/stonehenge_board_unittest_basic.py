@@ -0,0 +1,212 @@
+"""
+Unittests for the generated geometry of stonehenge boards.
+"""
+import random
+import re
+import unittest
+
+from stonehenge import StonehengeGame, StonehengeState, get_board, \
+    generate_ley_lines
+from match_runner import make_game
+from strategy import minimax_recursive_strategy, get_score
+from transposition_table import TranspositionTable, canonical_key
+
+
+class StonehengeBoardUnitTests(unittest.TestCase):
+    def test_side_two_lines(self):
+        """
+        Test the generated ley-lines of side length 2 against the board
+        drawn in the assignment handout.
+        """
+        board = get_board(2)
+        lines = [''.join(board.labels[i] for i in line)
+                 for line in board.lines]
+        self.assertEqual(lines, ['AB', 'CDE', 'FG',
+                                 'AC', 'BDF', 'EG',
+                                 'CF', 'ADG', 'BE'])
+
+    def test_side_five_down_right(self):
+        """
+        Test that the second down-right ley-line of side length 5 is J, P, V
+        and that every cell of side 5 lies on exactly one line per direction.
+        """
+        board = get_board(5)
+        self.assertEqual([board.labels[i] for i in board.lines[13]],
+                         ['J', 'P', 'V'])
+        for lines in board.cell_lines:
+            self.assertEqual([n // 6 for n in lines], [0, 1, 2])
+
+    def test_large_boards(self):
+        """
+        Test the shape of generated boards of side length 6 to 8 and play a
+        random game to the end on each.
+        """
+        rng = random.Random(148)
+        for length in range(6, 9):
+            board = get_board(length)
+            self.assertEqual(len(board.lines), 3 * (length + 1))
+            self.assertEqual(len(board.labels),
+                             (length + 1) * (length + 2) // 2 - 1 + length)
+            self.assertEqual(len(generate_ley_lines(length)),
+                             len(board.lines))
+            for lines in board.cell_lines:
+                self.assertEqual([n // (length + 1) for n in lines],
+                                 [0, 1, 2])
+            state = StonehengeState(True, length)
+            self.assertIs(state.board, board)
+            while state.get_possible_moves() != []:
+                state = state.make_move(
+                    rng.choice(state.get_possible_moves()))
+            self.assertTrue(max(state.n_p1, state.n_p2) * 2 >= state.total
+                            or state.unclaimed == [])
+
+    def test_symmetries_map_lines_to_lines(self):
+        """
+        Test that every symmetry maps each ley-line onto a ley-line of the
+        same size, and that the symmetries are distinct.
+        """
+        for length in range(1, 7):
+            board = get_board(length)
+            lines = {frozenset(line) for line in board.lines}
+            symmetries = board.get_symmetries()
+            self.assertEqual(len(set(symmetries)), len(symmetries))
+            for cell_order, line_order in symmetries:
+                for n, line in enumerate(board.lines):
+                    image = frozenset(cell_order.index(i) for i in line)
+                    self.assertIn(image, lines)
+                    self.assertEqual(board.lines[line_order.index(n)],
+                                     tuple(sorted(image)))
+
+    def test_symmetric_positions_same_value(self):
+        """
+        Test that positions with the same canonical key have the same
+        minimax score, and that a table keyed by canonical_key leaves the
+        minimax move unchanged.
+        """
+        game = make_game(StonehengeGame, True, '2')
+        scores = {}
+        state = game.current_state
+        for first in state.get_possible_moves():
+            after = state.make_move(first)
+            for second in after.get_possible_moves():
+                position = after.make_move(second)
+                key = position.canonical_key()
+                score = get_score(game, position, 'p1', 'p2')
+                self.assertEqual(scores.setdefault(key, score), score)
+        self.assertTrue(len(scores) < 42)
+        for moves in [[], ['B'], ['A', 'G']]:
+            game = make_game(StonehengeGame, True, '2')
+            for move in moves:
+                game.current_state = game.current_state.make_move(move)
+            self.assertEqual(
+                minimax_recursive_strategy(
+                    game, TranspositionTable(key=canonical_key)),
+                minimax_recursive_strategy(game))
+
+    def test_zobrist_key_incremental(self):
+        """
+        Test that the key kept up by make_move equals the key recomputed
+        from scratch, and that the same position reached by different move
+        orders is equal, with the same hash.
+        """
+        rng = random.Random(148)
+        for length in range(1, 6):
+            for _ in range(5):
+                state = StonehengeState(True, length)
+                moves = []
+                while state.get_possible_moves() != []:
+                    move = rng.choice(state.get_possible_moves())
+                    moves.append(move)
+                    state = state.make_move(move)
+                    fresh = StonehengeState.__new__(StonehengeState)
+                    fresh.__setstate__(state.__getstate__())
+                    self.assertEqual(fresh.key, state.key)
+                    self.assertEqual(fresh, state)
+                    self.assertEqual(hash(fresh), hash(state))
+                    self.assertTrue(0 <= state.key < 2 ** 64)
+        first = StonehengeState(True, 3).make_move('A').make_move('B')
+        first = first.make_move('C').make_move('D')
+        second = StonehengeState(True, 3).make_move('C').make_move('D')
+        second = second.make_move('A').make_move('B')
+        self.assertEqual(first, second)
+        self.assertEqual({first: 1}[second], 1)
+        self.assertNotEqual(first, first.make_move('E'))
+
+    def test_apply_undo_matches_make_move(self):
+        """
+        Test that apply_move changes a state exactly as make_move makes a
+        new one, and that undo_move takes every move back in turn.
+        """
+        rng = random.Random(23)
+        for length in range(1, 6):
+            state = StonehengeState(True, length)
+            made = StonehengeState(True, length)
+            history = []
+            while state.get_possible_moves() != []:
+                move = rng.choice(state.get_possible_moves())
+                history.append((made, state.apply_move(move)))
+                made = made.make_move(move)
+                self.assertEqual(state, made)
+                self.assertEqual(state.claims, made.claims)
+                self.assertEqual(state.unclaimed, made.unclaimed)
+                self.assertEqual((state.n_p1, state.n_p2),
+                                 (made.n_p1, made.n_p2))
+            for before, token in reversed(history):
+                state.undo_move(token)
+                self.assertEqual(state, before)
+                self.assertEqual(state.key, before.key)
+                self.assertEqual(state.claims, before.claims)
+                self.assertEqual(state.unclaimed, before.unclaimed)
+
+    def test_render_any_length(self):
+        """
+        Test that boards of every side length render each cell and ley-line
+        owner once, row by row, with the cells and the / and \\ between
+        them in line on every row, and that games accept those lengths.
+        """
+        for length in range(1, 9):
+            game = make_game(StonehengeGame, True, str(length))
+            state = game.current_state.make_move('A')
+            text = str(state)
+            self.assertEqual(repr(state),
+                             "Current Player: p2\nCurrent State:\n" + text)
+            tokens = [t for t in text.split() if t not in ["-", "/", "\\"]]
+            board = state.board
+            self.assertEqual(sorted(tokens), sorted(state.cells +
+                                                    state.owners))
+            lines = text.split("\n")
+            width = max(len(label) for label in board.labels)
+            columns = {}
+            for row in range(length + 1):
+                found = [(m.start(), m.group()) for m in
+                         re.finditer(r"[^\s-]+", lines[2 + 2 * row])]
+                cells = board.lines[row]
+                self.assertEqual([t for _, t in found[1:len(cells) + 1]],
+                                 [state.cells[i] for i in cells])
+                for i, (column, _) in zip(cells, found[1:]):
+                    columns[i] = (row, column)
+            step = columns[1][1] - columns[0][1]
+            for row in range(length + 1):
+                cells = board.lines[row]
+                self.assertEqual([columns[i][1] for i in cells],
+                                 list(range(columns[cells[0]][1],
+                                            columns[cells[0]][1] +
+                                            step * len(cells), step)))
+            for n in range(length + 1, len(board.lines)):
+                cells = sorted(board.lines[n], key=lambda i: columns[i])
+                for upper, lower in zip(cells, cells[1:]):
+                    row, top = columns[upper]
+                    self.assertEqual(columns[lower][0], row + 1)
+                    bottom = columns[lower][1]
+                    self.assertEqual(abs(bottom - top) * 2, step)
+                    marks = lines[3 + 2 * row]
+                    if bottom < top:
+                        between = marks[bottom + width:top]
+                        self.assertEqual(between.strip(), "/")
+                    else:
+                        between = marks[top + width:bottom]
+                        self.assertEqual(between.strip(), "\\")
+
+
+if __name__ == "__main__":
+    unittest.main()
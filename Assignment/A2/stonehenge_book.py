@@ -0,0 +1,276 @@
+"""
+An opening book for stonehenge.
+
+Every position of one side length up to some number of moves (plies) into
+the game is searched once, offline, and the move found is stored under the
+Zobrist hash of the position's canonical image (see
+StonehengeBoard.get_symmetries), so symmetric positions share one entry.
+The book is saved as a small binary file: a header, the sorted keys as
+unsigned 64-bit numbers and then one byte per key for the move, as the
+index of its cell in the canonical image.  Loading memory-maps the file,
+and a lookup is a binary search over the mapped keys.
+
+Run "python stonehenge_book.py -h" for the command line options, e.g.
+"python stonehenge_book.py 3 --plies 4" to build the book for side 3.
+
+NOTE: You do not have to run python-ta on this file.
+"""
+import argparse
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from bisect import bisect_left
+from typing import Any, Callable
+from match_runner import make_game
+from stonehenge import StonehengeGame, StonehengeState
+from strategy import alphabeta_ordered_recursive_strategy, \
+    iterative_deepening_strategy
+
+# The file starts with MAGIC, the side length, the plies and the number of
+# entries, followed by the keys and then the moves
+MAGIC = b"SHBOOK1\0"
+HEADER = struct.Struct("<8sIIQ")
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            "stonehenge_book_{}.bin")
+DEFAULT_PLIES = 4
+
+
+def canonical_form(state: StonehengeState) -> tuple:
+    """
+    Return the Zobrist hash of the canonical image of state (the image
+    StonehengeState.canonical_key is made from), and the cell order of a
+    symmetry that maps state to that image.
+
+    >>> a = StonehengeState(True, 3).make_move('A')
+    >>> b = StonehengeState(True, 3).make_move('L')
+    >>> canonical_form(a)[0] == canonical_form(b)[0]
+    True
+    >>> canonical_form(a)[0] == canonical_form(a.make_move('B'))[0]
+    False
+    """
+    board = state.board
+    marks = [c if c in ["1", "2"] else "@" for c in state.cells]
+    best = None
+    for cell_order, line_order in board.get_symmetries():
+        image = "".join([marks[i] for i in cell_order] +
+                        [state.owners[n] for n in line_order])
+        if best is None or image < best[0]:
+            best = image, cell_order
+    image, cell_order = best
+    size = len(board.labels)
+    key = 0 if state.p1_turn else board.zobrist_turn
+    for k, mark in enumerate(image[:size]):
+        if mark != "@":
+            key ^= board.zobrist_cells[mark][k]
+    for n, owner in enumerate(image[size:]):
+        if owner != "@":
+            key ^= board.zobrist_lines[owner][n]
+    return key, cell_order
+
+
+def build_entries(length: int, plies: int,
+                  strategy: Callable = alphabeta_ordered_recursive_strategy,
+                  progress: Any = None) -> dict:
+    """
+    Return a map from the canonical key of every unfinished position of side
+    length length, at most plies moves into a game started by either
+    player, to the move strategy chooses there, as the index of its cell in
+    the canonical image.
+
+    If progress is given, a line is written to it after each ply.
+
+    >>> entries = build_entries(1, 1)
+    >>> len(entries), sorted(set(entries.values()))
+    (2, [0])
+    """
+    game = make_game(StonehengeGame, True, str(length))
+    level = {}
+    for p1_starts in [True, False]:
+        state = StonehengeState(p1_starts, length)
+        level[canonical_form(state)[0]] = state
+    entries = {}
+    for ply in range(plies + 1):
+        next_level = {}
+        for key, state in level.items():
+            if state.get_possible_moves() == []:
+                continue
+            game.current_state = state
+            move = strategy(game)
+            cell_order = canonical_form(state)[1]
+            entries[key] = cell_order.index(state.board.index[move])
+            if ply < plies:
+                for move in state.get_possible_moves():
+                    child = state.make_move(move)
+                    next_level.setdefault(canonical_form(child)[0], child)
+        if progress is not None:
+            progress.write("ply {}: {} positions, {} entries\n".format(
+                ply, len(level), len(entries)))
+        level = next_level
+    return entries
+
+
+class OpeningBook:
+    """
+    The moves to play in the stonehenge positions of one side length, up to
+    some number of moves into the game.
+
+    length - the side length of the board
+    plies - how many moves into the game the book covers
+    """
+    length: int
+    plies: int
+
+    def __init__(self, length: int, plies: int, keys: Any,
+                 cells: Any) -> None:
+        """
+        Create a book from keys, sorted canonical keys, and cells, the move
+        for each key as a cell index in the canonical image.
+        """
+        self.length = length
+        self.plies = plies
+        self._keys = keys
+        self._cells = cells
+
+    @classmethod
+    def build(cls, length: int, plies: int,
+              strategy: Callable = alphabeta_ordered_recursive_strategy,
+              progress: Any = None) -> 'OpeningBook':
+        """
+        Return the book of the positions up to plies moves into a game of
+        side length length, with the moves chosen by strategy (see
+        build_entries).
+        """
+        entries = build_entries(length, plies, strategy, progress)
+        keys = array("Q", sorted(entries))
+        cells = array("B", [entries[key] for key in keys])
+        return cls(length, plies, keys, cells)
+
+    @classmethod
+    def load(cls, path: str) -> 'OpeningBook':
+        """
+        Return the book saved at path, memory-mapping its keys and moves.
+        """
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(mapped) < HEADER.size:
+            raise ValueError("{} is not a stonehenge book!".format(path))
+        magic, length, plies, count = HEADER.unpack_from(mapped)
+        if magic != MAGIC or len(mapped) != HEADER.size + 9 * count:
+            raise ValueError("{} is not a stonehenge book!".format(path))
+        start = HEADER.size + 8 * count
+        cells = memoryview(mapped)[start:]
+        if sys.byteorder == "little":
+            keys = memoryview(mapped)[HEADER.size:start].cast("Q")
+        else:
+            keys = array("Q", mapped[HEADER.size:start])
+            keys.byteswap()
+        return cls(length, plies, keys, cells)
+
+    def save(self, path: str) -> None:
+        """
+        Write this book to path.
+        """
+        keys = array("Q", self._keys)
+        if sys.byteorder != "little":
+            keys.byteswap()
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, self.length, self.plies, len(keys)))
+            f.write(keys.tobytes())
+            f.write(bytes(self._cells))
+
+    def __len__(self) -> int:
+        """
+        Return the number of positions in this book.
+        """
+        return len(self._keys)
+
+    def lookup(self, state: StonehengeState) -> Any:
+        """
+        Return the move the book has for state, or None if state is not in
+        the book.
+
+        >>> book = OpeningBook.build(2, 1)
+        >>> book.lookup(StonehengeState(True, 2).make_move('A'))
+        'B'
+        >>> book.lookup(StonehengeState(True, 3)) is None
+        True
+        """
+        if state.length != self.length:
+            return None
+        key, cell_order = canonical_form(state)
+        i = bisect_left(self._keys, key)
+        if i == len(self._keys) or self._keys[i] != key:
+            return None
+        return state.board.labels[cell_order[self._cells[i]]]
+
+
+_BOOKS = {}
+
+
+def get_book(length: int, path: str = None) -> Any:
+    """
+    Return the book for side length length saved at path (DEFAULT_PATH for
+    that length by default), loading it the first time it is asked for, or
+    None if it has not been built.
+    """
+    if path is None:
+        path = DEFAULT_PATH.format(length)
+    if path not in _BOOKS:
+        if not os.path.exists(path):
+            return None
+        _BOOKS[path] = OpeningBook.load(path)
+    return _BOOKS[path]
+
+
+def opening_book_strategy(game: Any, book: OpeningBook = None,
+                          fallback: Callable =
+                          iterative_deepening_strategy) -> Any:
+    """
+    Return the move book (the saved book for the side length of game, by
+    default) has for the current position, or the move of fallback once the
+    game has left the book or has no book.
+    """
+    state = game.current_state
+    if book is None and isinstance(state, StonehengeState):
+        book = get_book(state.length)
+    if book is not None and isinstance(state, StonehengeState):
+        move = book.lookup(state)
+        if move is not None and state.is_valid_move(move):
+            return move
+    return fallback(game)
+
+
+def main(argv: list = None) -> OpeningBook:
+    """
+    Build and save the book asked for on the command line argv, and return
+    it.
+    """
+    from game_interface import usable_strategies
+    parser = argparse.ArgumentParser(
+        description="Build the opening book for a stonehenge side length.")
+    parser.add_argument("length", type=int)
+    parser.add_argument("--plies", type=int, default=DEFAULT_PLIES)
+    parser.add_argument("--strategy", choices=sorted(usable_strategies),
+                        default="aro",
+                        help="the strategy choosing each move (exact "
+                             "alpha-beta by default; 'id' for a "
+                             "time-limited search on large boards)")
+    parser.add_argument("-o", "--output",
+                        help="the file to write (by default the one "
+                             "opening_book_strategy reads)")
+    args = parser.parse_args(argv)
+    start = time.perf_counter()
+    book = OpeningBook.build(args.length, args.plies,
+                             usable_strategies[args.strategy], sys.stdout)
+    path = args.output or DEFAULT_PATH.format(args.length)
+    book.save(path)
+    print("{} positions written to {} in {:.1f} seconds".format(
+        len(book), path, time.perf_counter() - start))
+    return book
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,96 @@
+"""
+Unittests for the stonehenge opening book.
+"""
+import os
+import tempfile
+import unittest
+
+from game_interface import playable_games, usable_strategies
+from match_runner import make_game
+from stonehenge import StonehengeState
+from stonehenge_book import OpeningBook, opening_book_strategy
+from move_ordering import MoveOrdering, capture_priority
+from strategy import get_alphabeta_score
+StonehengeGame = playable_games['h']
+SubtractSquareGame = playable_games['s']
+
+
+def positions(length, plies):
+    level = [StonehengeState(True, length), StonehengeState(False, length)]
+    for _ in range(plies + 1):
+        for state in level:
+            yield state
+        level = [state.make_move(move) for state in level
+                 for move in state.get_possible_moves()]
+
+
+def move_score(game, state, move):
+    player = state.get_current_player_name()
+    counter = "p2" if player == "p1" else "p1"
+    score = -1 * get_alphabeta_score(game, state.make_move(move), counter,
+                                     player, -2, 2,
+                                     MoveOrdering(capture_priority))
+    game.current_state = state
+    return score
+
+
+class OpeningBookUnitTests(unittest.TestCase):
+    def test_moves_are_best(self):
+        """
+        Test that the book's move in every position it covers, including
+        the symmetric images of the positions it stores, scores as well as
+        minimax's move.
+        """
+        for length, plies in [(2, 3), (3, 1)]:
+            book = OpeningBook.build(length, plies)
+            game = make_game(StonehengeGame, True, str(length))
+            for state in positions(length, plies):
+                if state.get_possible_moves() == []:
+                    self.assertIsNone(book.lookup(state))
+                    continue
+                game.current_state = state
+                move = book.lookup(state)
+                self.assertTrue(state.is_valid_move(move))
+                best = usable_strategies['aro'](game)
+                self.assertEqual(move_score(game, state, move),
+                                 move_score(game, state, best))
+
+    def test_save_and_load(self):
+        """
+        Test that a saved book loads back with the same moves, and that
+        loading a file that is not a book raises ValueError.
+        """
+        book = OpeningBook.build(3, 2)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "book.bin")
+            book.save(path)
+            loaded = OpeningBook.load(path)
+            self.assertEqual((loaded.length, loaded.plies, len(loaded)),
+                             (3, 2, len(book)))
+            for state in positions(3, 3):
+                self.assertEqual(loaded.lookup(state), book.lookup(state))
+            other = os.path.join(directory, "other.bin")
+            with open(other, "wb") as f:
+                f.write(b"not a book")
+            self.assertRaises(ValueError, OpeningBook.load, other)
+
+    def test_strategy_falls_back(self):
+        """
+        Test that the strategy uses its fallback for positions outside the
+        book and for other games.
+        """
+        book = OpeningBook.build(2, 1)
+        game = make_game(StonehengeGame, True, "2")
+        self.assertEqual(opening_book_strategy(game, book, lambda g: None),
+                         book.lookup(game.current_state))
+        game.current_state = game.current_state.make_move('A')
+        game.current_state = game.current_state.make_move('B')
+        self.assertIsNone(book.lookup(game.current_state))
+        self.assertEqual(opening_book_strategy(game, book, lambda g: 'X'),
+                         'X')
+        game = make_game(SubtractSquareGame, True, "10")
+        self.assertEqual(opening_book_strategy(game, book, lambda g: 1), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
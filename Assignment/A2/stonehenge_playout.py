@@ -0,0 +1,224 @@
+"""
+A fast random-playout kernel for stonehenge.
+
+Playing a random game with StonehengeState.make_move copies the state's
+lists at every move, which is where a sampling strategy such as
+mcts.MonteCarloSearch spends nearly all of its time.  A PlayoutKernel
+instead loads a position into scratch lists allocated once per board, plays
+moves on them in place, and undoes them again afterwards, so that many
+playouts can be run from one position without copying anything.
+
+NOTE: You do not have to run python-ta on this file.
+"""
+import random
+from typing import Any
+from stonehenge import StonehengeState, get_board
+
+
+class PlayoutKernel:
+    """
+    Scratch space for playing stonehenge moves in place on one board size.
+
+    length - the side length of the board
+    free - the indices of the unclaimed cells: the first n_free of them are
+           still free, the rest are the cells claimed since the last load,
+           the most recent first
+    n_free - the number of free cells
+    claims - for players 0 and 1, the number of cells they have claimed in
+             each ley-line
+    owners - for each ley-line, the player (0 or 1) who captured it, or -1
+    captured - for players 0 and 1, the number of ley-lines they captured
+    player - the player to move, 0 for p1 and 1 for p2
+    random - the function drawing a float in [0, 1) for each random move
+    """
+    length: int
+    free: list
+    n_free: int
+    claims: list
+    owners: list
+    captured: list
+    player: int
+    random: Any
+
+    def __init__(self, length: int, seed: Any = None) -> None:
+        """
+        Create a new PlayoutKernel self for boards of side length length,
+        with nothing loaded, whose random moves are seeded with seed.
+        """
+        board = get_board(length)
+        self.length = length
+        self._cell_lines = board.cell_lines
+        self._needs = [(size + 1) // 2 for size in board.sizes]
+        self._half = (len(board.lines) + 1) // 2
+        self.free = list(range(len(board.labels)))
+        self.n_free = 0
+        self.claims = [[0] * len(board.lines), [0] * len(board.lines)]
+        self.owners = [-1] * len(board.lines)
+        self.captured = [0, 0]
+        self.player = 0
+        self.random = random.Random(seed).random
+        # For each move made: the cell and the ley-lines it captured
+        self._moves = []
+
+    def load(self, state: StonehengeState) -> None:
+        """
+        Load the position of state, forgetting any moves made before.
+        """
+        index = state.board.index
+        n = 0
+        for label in state.unclaimed:
+            self.free[n] = index[label]
+            n += 1
+        self.n_free = n
+        self.claims[0][:] = state.claims["1"]
+        self.claims[1][:] = state.claims["2"]
+        owners = self.owners
+        for i, owner in enumerate(state.owners):
+            owners[i] = -1 if owner == "@" else int(owner) - 1
+        self.captured[0] = state.n_p1
+        self.captured[1] = state.n_p2
+        self.player = 0 if state.p1_turn else 1
+        self._moves.clear()
+
+    def is_over(self) -> bool:
+        """
+        Return whether the loaded game is over.
+        """
+        return (self.n_free == 0 or self.captured[0] >= self._half
+                or self.captured[1] >= self._half)
+
+    def apply(self, cell: int) -> None:
+        """
+        Let the player to move claim cell, the index of a free cell.
+
+        >>> k = PlayoutKernel(1)
+        >>> k.load(StonehengeState(True, 1))
+        >>> k.apply(0)
+        >>> k.owners, k.player, k.free[:k.n_free]
+        ([0, -1, 0, -1, 0, -1], 1, [2, 1])
+        """
+        n = self.n_free - 1
+        free = self.free
+        j = free.index(cell, 0, n + 1)
+        free[j] = free[n]
+        free[n] = cell
+        self.n_free = n
+        self._claim(cell)
+
+    def undo(self) -> None:
+        """
+        Take back the last move made since the last load.
+
+        >>> k = PlayoutKernel(1)
+        >>> k.load(StonehengeState(True, 1))
+        >>> k.apply(0)
+        >>> k.undo()
+        >>> k.owners, k.player, sorted(k.free[:k.n_free])
+        ([-1, -1, -1, -1, -1, -1], 0, [0, 1, 2])
+        """
+        cell, lines = self._moves.pop()
+        player = 1 - self.player
+        claims = self.claims[player]
+        for n in self._cell_lines[cell]:
+            claims[n] -= 1
+        for n in lines:
+            self.owners[n] = -1
+        self.captured[player] -= len(lines)
+        self.player = player
+        self.n_free += 1
+
+    def _claim(self, cell: int) -> None:
+        """
+        Let the player to move claim cell, which is no longer free, and
+        record the move for undo.
+        """
+        player = self.player
+        claims = self.claims[player]
+        owners = self.owners
+        needs = self._needs
+        lines = []
+        for n in self._cell_lines[cell]:
+            claims[n] += 1
+            if owners[n] < 0 and claims[n] >= needs[n]:
+                owners[n] = player
+                lines.append(n)
+        self.captured[player] += len(lines)
+        self._moves.append((cell, lines))
+        self.player = 1 - player
+
+    def playout(self) -> int:
+        """
+        Play random moves from the loaded position to the end of the game,
+        take them all back, and return the winner: 0 for p1 and 1 for p2.
+        (Stonehenge cannot end in a tie.)
+
+        The moves are taken back by copying the claims and owners saved
+        before the first one back in place, which is cheaper than undoing
+        them one by one; the claimed cells are simply counted as free
+        again.
+
+        >>> k = PlayoutKernel(2, seed=0)
+        >>> k.load(StonehengeState(True, 2).make_move('A').make_move('B'))
+        >>> k.playout() in [0, 1], k.n_free, k.captured
+        (True, 5, [2, 1])
+        """
+        free = self.free
+        claims = self.claims
+        p1_claims, p2_claims = claims
+        saved_p1, saved_p2 = p1_claims[:], p2_claims[:]
+        owners = self.owners
+        saved_owners = owners[:]
+        needs = self._needs
+        cell_lines = self._cell_lines
+        half = self._half
+        rand = self.random
+        captured = self.captured
+        p1_captured, p2_captured = captured
+        n = self.n_free
+        player = self.player
+        winner = -1
+        if p1_captured >= half:
+            winner = 0
+        elif p2_captured >= half:
+            winner = 1
+        while winner < 0 and n:
+            j = int(rand() * n)
+            n -= 1
+            cell = free[j]
+            free[j] = free[n]
+            free[n] = cell
+            counts = claims[player]
+            gained = 0
+            for line in cell_lines[cell]:
+                counts[line] += 1
+                if owners[line] < 0 and counts[line] >= needs[line]:
+                    owners[line] = player
+                    gained += 1
+            if gained:
+                captured[player] += gained
+                if captured[player] >= half:
+                    winner = player
+            player = 1 - player
+        if winner < 0:
+            winner = 1 - player
+        p1_claims[:] = saved_p1
+        p2_claims[:] = saved_p2
+        owners[:] = saved_owners
+        captured[0] = p1_captured
+        captured[1] = p2_captured
+        return winner
+
+    def winner(self, state: StonehengeState) -> str:
+        """
+        Return the winner, "p1" or "p2", of one random game played on from
+        state.
+
+        This has the signature of the playout hook of mcts.MonteCarloSearch.
+        """
+        self.load(state)
+        return "p2" if self.playout() else "p1"
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
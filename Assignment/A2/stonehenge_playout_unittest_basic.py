@@ -0,0 +1,59 @@
+import random
+import unittest
+
+from stonehenge import StonehengeState
+from stonehenge_playout import PlayoutKernel
+
+
+def snapshot(kernel):
+    return (sorted(kernel.free[:kernel.n_free]), kernel.claims[0][:],
+            kernel.claims[1][:], kernel.owners[:], kernel.captured[:],
+            kernel.player)
+
+
+class PlayoutKernelUnitTests(unittest.TestCase):
+    def test_apply_matches_make_move(self):
+        rng = random.Random(1)
+        for length in [1, 2, 3, 4]:
+            kernel = PlayoutKernel(length)
+            state = StonehengeState(True, length)
+            kernel.load(state)
+            loaded = snapshot(kernel)
+            history = []
+            while state.get_possible_moves():
+                move = rng.choice(state.get_possible_moves())
+                kernel.apply(state.board.index[move])
+                state = state.make_move(move)
+                history.append(snapshot(kernel))
+                other = PlayoutKernel(length)
+                other.load(state)
+                self.assertEqual(snapshot(kernel), snapshot(other))
+            self.assertTrue(kernel.is_over())
+            for expected in reversed(history[:-1]):
+                kernel.undo()
+                self.assertEqual(snapshot(kernel), expected)
+            kernel.undo()
+            self.assertEqual(snapshot(kernel), loaded)
+
+    def test_playout_restores(self):
+        state = StonehengeState(True, 3).make_move('A').make_move('F')
+        kernel = PlayoutKernel(3, seed=5)
+        kernel.load(state)
+        loaded = snapshot(kernel)
+        winners = [kernel.playout() for _ in range(200)]
+        self.assertEqual(snapshot(kernel), loaded)
+        self.assertEqual(set(winners), {0, 1})
+        again = PlayoutKernel(3, seed=5)
+        again.load(state)
+        self.assertEqual([again.playout() for _ in range(200)], winners)
+
+    def test_finished_games(self):
+        # Claiming A captures half of the ley-lines of side 1 at once
+        kernel = PlayoutKernel(1, seed=0)
+        for p1_turn, winner in [(True, "p1"), (False, "p2")]:
+            state = StonehengeState(p1_turn, 1).make_move('A')
+            self.assertEqual(kernel.winner(state), winner)
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -5,9 +5,27 @@ NOTE: Make sure this file adheres to python-ta.
 Adjust the type annotations as needed, and implement both a recursive
 and an iterative version of minimax.
 """
-from typing import Any
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Callable
+from game_state import supports_apply
 from minimax_stack import MinimaxStack
-from minimax_tree import MinimaxTree
+from minimax_tree import MinimaxTree, TreeKeeper, SearchFrame
+from transposition_table import TranspositionTable
+from move_ordering import MoveOrdering, capture_priority
+
+# The table shared by the cached minimax strategies, so that positions solved
+# while choosing one move are reused for every later move of the session.
+SHARED_TABLE = TranspositionTable()
+
+# The tree kept by minimax_iterative_reuse_strategy between its moves.
+SHARED_TREE = TreeKeeper()
+
+
+class SearchTimeout(Exception):
+    """
+    Raised inside a search whose time budget has run out.
+    """
 
 
 def interactive_strategy(game: Any) -> str:
@@ -57,11 +75,15 @@ def rough_outcome_strategy(game: Any) -> Any:
     return best_move
 
 
-def minimax_recursive_strategy(game: Any) -> Any:
+def minimax_recursive_strategy(game: Any,
+                               table: TranspositionTable = None) -> Any:
     """
     Return a move that guarantees the highest possible
     score from the current position.
     This is a recursive version.
+
+    If table is given, scores of positions already solved are taken from it
+    and newly solved positions are stored in it.
     """
     state = game.current_state
     player = state.get_current_player_name()
@@ -72,66 +94,488 @@ def minimax_recursive_strategy(game: Any) -> Any:
         counter = "p1"
     for move in state.get_possible_moves():
         old_state = game.current_state
-        s.append(-1 * get_score(game, state.make_move(move), counter, player))
+        s.append(-1 * get_score(game, state.make_move(move), counter, player,
+                                table, 1))
         game.current_state = old_state
     max_score = max(s)
     return state.get_possible_moves()[s.index(max_score)]
 
 
-def minimax_iterative_strategy(game: Any) -> Any:
+def minimax_iterative_strategy(game: Any,
+                               table: TranspositionTable = None,
+                               keeper: TreeKeeper = None) -> Any:
     """
     Return a move that guarantees the highest
     possible score from the current position.
     This is an interactive version.
+
+    If table is given, scores of positions already solved are taken from it
+    and newly solved positions are stored in it.  If keeper is given, the
+    search starts from the subtree it kept for the current position, and
+    the finished tree is kept in it for the next call.
     """
-    t = MinimaxTree(game.current_state, None, [], None)
+    if keeper is None:
+        keeper = TreeKeeper()
+    t = keeper.take(game.current_state)
     s = MinimaxStack()
     s.add(t)
-    player = game.current_state.get_current_player_name()
+    old_state = game.current_state
+    while not s.is_empty():
+        i = s.remove()
+        if i.children != []:
+            score_from_children(i, table)
+        elif not look_up_score(game, i, table if i is not t else None):
+            expand_tree(i, s)
+    game.current_state = old_state
+    keeper.keep(t)
+    possible_move = []
+    for ch in t.children:
+        if -1 * ch.score == t.score:
+            possible_move.append(ch.move)
+    return possible_move[0]
+
+
+def look_up_score(game: Any, tree: MinimaxTree,
+                  table: TranspositionTable = None) -> bool:
+    """
+    Set the score of tree if it is known without searching: because the
+    game is over at its position, or from table, if given.  Return whether
+    it was set.
+    """
+    game.current_state = tree.value
+    if game.is_over(tree.value):
+        if game.is_winner("p1") or game.is_winner("p2"):
+            tree.score = -1
+        else:
+            tree.score = 0
+        return True
+    cached = None
+    if table is not None:
+        cached = table.get(tree.value)
+    if cached is not None:
+        tree.score = cached
+    return cached is not None
+
+
+def expand_tree(tree: MinimaxTree, s: MinimaxStack) -> None:
+    """
+    Add a child to tree for each move from its position, and push tree and
+    then its children onto s, so that they are scored before it.
+    """
+    s.add(tree)
+    for move in tree.value.get_possible_moves():
+        new_tree = MinimaxTree(tree.value.make_move(move), move, [], None,
+                               tree.depth + 1)
+        tree.children.append(new_tree)
+        s.add(new_tree)
+
+
+def score_from_children(tree: MinimaxTree,
+                        table: TranspositionTable = None) -> None:
+    """
+    Set the score of tree from the scores of its children, and store it in
+    table, if given.
+    """
+    tree.score = max([-1 * c.score for c in tree.children])
+    if table is not None:
+        table.put(tree.value, tree.score, tree.depth)
+
+
+def minimax_lean_strategy(game: Any) -> Any:
+    """
+    Return the same move as minimax_iterative_strategy, keeping only the
+    path from the current position to the position being searched in
+    memory instead of the whole game tree.
+    """
+    old_state = game.current_state
+    root = SearchFrame(old_state)
+    frame = root
+    while frame is not None:
+        move = next(frame.moves, frame)
+        if move is frame:
+            # Every move from frame is searched: pass its score up
+            if frame.parent is not None:
+                frame.parent.update(frame.move, frame.score)
+            frame = frame.parent
+            continue
+        new_state = frame.state.make_move(move)
+        game.current_state = new_state
+        if game.is_over(new_state):
+            score = 0
+            if game.is_winner("p1") or game.is_winner("p2"):
+                score = -1
+            frame.update(move, score)
+        else:
+            frame = SearchFrame(new_state, move, frame)
+    game.current_state = old_state
+    return root.best
+
+
+def get_score(game: Any, state: Any, player: str, counter: str,
+              table: TranspositionTable = None, depth: int = 0) -> int:
+    """
+    Return the highest possible score for the current state.
+
+    If table is given, it is consulted before searching state and updated
+    with the score found; depth is how far state is below the search root.
+    Otherwise, if state supports apply_move, every move is searched on
+    state itself and taken back afterwards, so no new states are made.
+    """
+    game.current_state = state
+    if game.is_over(state):
+        if game.is_winner(player) or game.is_winner(counter):
+            return -1
+        return 0
+    if table is None and supports_apply(state):
+        score = -2
+        for move in state.get_possible_moves():
+            token = state.apply_move(move)
+            score = max(score, -1 * get_score(game, state, counter, player,
+                                              None, depth + 1))
+            state.undo_move(token)
+        return score
+    if table is not None:
+        score = table.get(state)
+        if score is not None:
+            return score
+    score = max([-1 * get_score(game, state.make_move(move), counter, player,
+                                table, depth + 1)
+                 for move in state.get_possible_moves()])
+    if table is not None:
+        table.put(state, score, depth)
+    return score
+
+
+def alphabeta_recursive_strategy(game: Any,
+                                 ordering: MoveOrdering = None) -> Any:
+    """
+    Return the same move as minimax_recursive_strategy, skipping every
+    subtree that cannot change the choice (alpha-beta pruning).
+    This is a recursive version.
+
+    If ordering is given, it chooses the order moves are searched in.
+    """
+    return search_alphabeta_root(game, get_alphabeta_score, ordering)
+
+
+def alphabeta_iterative_strategy(game: Any,
+                                 ordering: MoveOrdering = None) -> Any:
+    """
+    Return the same move as minimax_iterative_strategy, skipping every
+    subtree that cannot change the choice (alpha-beta pruning).
+    This is an iterative version: children are expanded one at a time, so
+    the remaining siblings are never created once a node is cut off.
+
+    If ordering is given, it chooses the order moves are searched in.
+    """
+    return search_alphabeta_root(game, get_stack_alphabeta_score, ordering)
+
+
+def alphabeta_ordered_recursive_strategy(game: Any) -> Any:
+    """
+    Return the move of alphabeta_recursive_strategy, searching captures,
+    killer moves and moves with a history of cutoffs first.
+    """
+    return alphabeta_recursive_strategy(game, MoveOrdering(capture_priority))
+
+
+def alphabeta_ordered_iterative_strategy(game: Any) -> Any:
+    """
+    Return the move of alphabeta_iterative_strategy, searching captures,
+    killer moves and moves with a history of cutoffs first.
+    """
+    return alphabeta_iterative_strategy(game, MoveOrdering(capture_priority))
+
+
+def search_alphabeta_root(game: Any, get_child_score: Callable,
+                          ordering: MoveOrdering = None) -> Any:
+    """
+    Return the move minimax would choose for game, scoring each move with
+    get_child_score (get_alphabeta_score or get_stack_alphabeta_score).
+
+    Moves are searched in the order chosen by ordering, if given, but the
+    move returned is still the first best move in get_possible_moves order.
+    """
+    state = game.current_state
+    player = state.get_current_player_name()
     if player == "p1":
         counter = "p2"
     else:
         counter = "p1"
-    old_state = game.current_state
+    moves = state.get_possible_moves()
+    searched = moves
+    if ordering is not None:
+        searched = ordering.order(state, moves, 0)
+    best_move = None
+    best_score = -2  # Lower than any score, so the first move replaces it
+    best_index = len(moves)
+    for move in searched:
+        index = moves.index(move)
+        # A move listed before the best one wins a tie with it, so its
+        # search must tell an equal score from a worse one.  Any other move
+        # has to be strictly better.
+        bound = best_score - 1
+        if index > best_index:
+            bound = best_score
+        if bound >= state.WIN:
+            continue
+        score = -1 * get_child_score(game, state.make_move(move), counter,
+                                     player, -1 * state.WIN,
+                                     -1 * max(bound, state.LOSE), ordering)
+        game.current_state = state
+        if score > best_score or (score == best_score and index < best_index):
+            best_score = score
+            best_move = move
+            best_index = index
+    return best_move
+
+
+def get_alphabeta_score(game: Any, state: Any, player: str, counter: str,
+                        alpha: int, beta: int, ordering: MoveOrdering = None,
+                        depth: int = 1) -> int:
+    """
+    Return the highest possible score for the current state if it lies
+    strictly between alpha and beta.  Otherwise return a bound on it: at
+    most alpha, or at least beta.
+
+    depth is how far state is below the search root; if ordering is given,
+    it chooses the order moves are searched in and learns of every cutoff.
+    Like get_score, moves are searched on state itself if it supports
+    apply_move.
+    """
+    game.current_state = state
+    if game.is_over(state):
+        if game.is_winner(player) or game.is_winner(counter):
+            return -1
+        return 0
+    best_score = -2
+    moves = state.get_possible_moves()
+    if ordering is not None:
+        moves = ordering.order(state, moves, depth)
+    in_place = supports_apply(state)
+    for move in moves:
+        if in_place:
+            token = state.apply_move(move)
+            child = state
+        else:
+            child = state.make_move(move)
+        score = -1 * get_alphabeta_score(game, child, counter, player,
+                                         -1 * beta,
+                                         -1 * max(alpha, best_score),
+                                         ordering, depth + 1)
+        if in_place:
+            state.undo_move(token)
+        best_score = max(best_score, score)
+        if best_score >= beta:
+            if ordering is not None:
+                ordering.cutoff(move, depth)
+            break
+    return best_score
+
+
+def get_stack_alphabeta_score(game: Any, state: Any, player: str,
+                              counter: str, alpha: int, beta: int,
+                              ordering: MoveOrdering = None,
+                              depth: int = 1) -> int:
+    """
+    Return the same score as get_alphabeta_score, searching with a
+    MinimaxStack instead of recursion.
+    """
+    t = MinimaxTree(state, None, [], None, depth, alpha, beta)
+    s = MinimaxStack()
+    s.add(t)
     while not s.is_empty():
         i = s.remove()
         game.current_state = i.value
-        if i.value.get_possible_moves() == [] and i.children == []:
+        if i.children == [] and game.is_over(i.value):
             if game.is_winner(player) or game.is_winner(counter):
                 i.score = -1
             else:
                 i.score = 0
-        elif i.value.get_possible_moves() != [] and i.children != []:
-            lst = []
-            for c in i.children:
-                lst.append(-1 * c.score)
-            i.score = max(lst)
-        else:
+            continue
+        if i.children == []:
+            i.score = -2
+            i.moves = i.value.get_possible_moves()
+            if ordering is not None:
+                i.moves = ordering.order(i.value, i.moves, i.depth)
+        elif -1 * i.children[-1].score > i.score:
+            i.score = -1 * i.children[-1].score
+            if i.score >= i.beta and ordering is not None:
+                ordering.cutoff(i.children[-1].move, i.depth)
+        if i.score < i.beta and len(i.children) < len(i.moves):
+            move = i.moves[len(i.children)]
+            new_tree = MinimaxTree(i.value.make_move(move), move, [], None,
+                                   i.depth + 1, -1 * i.beta,
+                                   -1 * max(i.alpha, i.score))
+            i.children.append(new_tree)
             s.add(i)
-            for move in i.value.get_possible_moves():
-                new_state = i.value.make_move(move)
-                new_tree = MinimaxTree(new_state, move, [], None)
-                i.children.append(new_tree)
-                s.add(new_tree)
+            s.add(new_tree)
+    return t.score
+
+
+def minimax_parallel_strategy(game: Any, workers: int = None,
+                              pool: Executor = None) -> Any:
+    """
+    Return the same move as minimax_recursive_strategy, scoring the subtree
+    under each root move in a separate worker process.
+
+    workers is the number of processes to start (one per CPU by default);
+    pass pool instead to reuse an already running executor across moves.
+    """
+    state = game.current_state
+    player = state.get_current_player_name()
+    if player == "p1":
+        counter = "p2"
+    else:
+        counter = "p1"
+    moves = state.get_possible_moves()
+    children = [state.make_move(move) for move in moves]
+    if pool is None:
+        with ProcessPoolExecutor(max_workers=workers) as new_pool:
+            scores = list(new_pool.map(get_subtree_score,
+                                       [game] * len(moves), children,
+                                       [counter] * len(moves),
+                                       [player] * len(moves)))
+    else:
+        scores = list(pool.map(get_subtree_score, [game] * len(moves),
+                               children, [counter] * len(moves),
+                               [player] * len(moves)))
+    s = [-1 * score for score in scores]
+    return moves[s.index(max(s))]
+
+
+def get_subtree_score(game: Any, state: Any, player: str,
+                      counter: str) -> int:
+    """
+    Return get_score for state, leaving game as it was.
+
+    This is the unit of work minimax_parallel_strategy hands to a worker:
+    game and state arrive pickled, so the worker searches its own copy.
+    """
+    old_state = game.current_state
+    score = get_score(game, state, player, counter)
     game.current_state = old_state
-    possible_move = []
-    for ch in t.children:
-        if -1 * ch.score == t.score:
-            possible_move.append(ch.move)
-    return possible_move[0]
+    return score
 
 
-def get_score(game: Any, state: Any, player: str, counter: str) -> int:
+def iterative_deepening_strategy(game: Any, budget: float = 0.2,
+                                 info: dict = None) -> Any:
     """
-    Return the highest possible score for the current state.
+    Return a move found by searching 1, 2, 3, ... moves ahead until budget
+    seconds have passed, scoring the states at the depth limit with
+    rough_outcome().
+
+    The move comes from the deepest search that finished in time (or, if
+    not even the 1-move search finished, the best move it had seen so far).
+    If info is given, info['depth'] is set to the depth of that search (0
+    if none finished) and info['exact'] to whether it saw the whole game.
     """
+    deadline = time.perf_counter() + budget
+    state = game.current_state
+    moves = state.get_possible_moves()
+    best_move = moves[0] if moves else None
+    depth = 0
+    exact = False
+    while not exact:
+        cut = [False]
+        move, finished = search_limited_root(game, depth, deadline, cut)
+        if finished or (depth == 0 and move is not None):
+            best_move = move
+        if not finished:
+            break
+        depth += 1
+        exact = not cut[0]
+    if info is not None:
+        info['depth'] = depth
+        info['exact'] = exact
+    return best_move
+
+
+def search_limited_root(game: Any, depth: int, deadline: float,
+                        cut: list) -> tuple:
+    """
+    Return the best move from game.current_state with each move scored by
+    get_limited_score depth more moves ahead, and whether the search
+    finished before deadline.  If it did not, the move is the best one seen
+    so far (or None).  game.current_state is left as it was.
+
+    cut[0] is set to True if the depth limit hid part of the game.
+    """
+    state = game.current_state
+    best_move = None
+    best_score = -2
+    try:
+        for move in state.get_possible_moves():
+            score = -1 * get_limited_score(game, state.make_move(move), depth,
+                                           -1 * state.WIN,
+                                           -1 * max(best_score, state.LOSE),
+                                           deadline, cut)
+            if score > best_score:
+                best_score = score
+                best_move = move
+            if best_score >= state.WIN:
+                break
+    except SearchTimeout:
+        game.current_state = state
+        return best_move, False
+    game.current_state = state
+    return best_move, True
+
+
+def get_limited_score(game: Any, state: Any, depth: int, alpha: float,
+                      beta: float, deadline: float, cut: list) -> float:
+    """
+    Return the score of state searched depth more moves ahead, using
+    rough_outcome() for the states at the depth limit.  Like
+    get_alphabeta_score, a score outside (alpha, beta) is only a bound.
+
+    cut[0] is set to True if the depth limit hid part of the game, and
+    SearchTimeout is raised once time.perf_counter() passes deadline.
+    """
+    if time.perf_counter() > deadline:
+        raise SearchTimeout
     game.current_state = state
     if game.is_over(state):
-        if game.is_winner(player) or game.is_winner(counter):
+        if game.is_winner("p1") or game.is_winner("p2"):
             return -1
         return 0
-    return max([-1 * get_score(game, state.make_move(move), counter, player)
-                for move in state.get_possible_moves()])
+    if depth == 0:
+        cut[0] = True
+        return state.rough_outcome()
+    best_score = -2
+    for move in state.get_possible_moves():
+        score = -1 * get_limited_score(game, state.make_move(move), depth - 1,
+                                       -1 * beta, -1 * max(alpha, best_score),
+                                       deadline, cut)
+        best_score = max(best_score, score)
+        if best_score >= beta:
+            break
+    return best_score
+
+
+def minimax_recursive_cached_strategy(game: Any) -> Any:
+    """
+    Return a move chosen by recursive minimax, sharing SHARED_TABLE with
+    every earlier call.
+    """
+    return minimax_recursive_strategy(game, SHARED_TABLE)
+
+
+def minimax_iterative_cached_strategy(game: Any) -> Any:
+    """
+    Return a move chosen by iterative minimax, sharing SHARED_TABLE with
+    every earlier call.
+    """
+    return minimax_iterative_strategy(game, SHARED_TABLE)
+
+
+def minimax_iterative_reuse_strategy(game: Any) -> Any:
+    """
+    Return a move chosen by iterative minimax, continuing from the tree
+    SHARED_TREE kept from the previous call when the game has only moved on
+    by one or two moves since.
+    """
+    return minimax_iterative_strategy(game, None, SHARED_TREE)
 
 
 if __name__ == "__main__":
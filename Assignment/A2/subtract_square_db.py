@@ -0,0 +1,175 @@
+"""
+A solved-position database for SubtractSquare.
+
+Every total up to some limit is solved once, bottom-up, and stored as one
+unsigned 16-bit number per total: 0 if the player to move loses, otherwise
+the root k of the smallest winning square k ** 2 (the move minimax would
+pick).  The table is saved to a small binary file which is memory-mapped
+when loaded, so a lookup never has to read more than one page.
+
+NOTE: You do not have to run python-ta on this file.
+"""
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Any, Callable
+from strategy import minimax_recursive_strategy
+from subtract_square_state import SubtractSquareState
+
+# The file starts with MAGIC and the limit, followed by the table
+MAGIC = b"SSQDB1\0\0"
+HEADER = struct.Struct("<8sQ")
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            "subtract_square.db")
+DEFAULT_LIMIT = 10000
+
+
+def build_table(limit: int) -> array:
+    """
+    Return the table for every total from 0 to limit.
+
+    Totals are visited in increasing order; each losing total marks every
+    total a square above it as winning, and because later losing totals are
+    closer, the last mark is the smallest winning square.
+
+    >>> list(build_table(10))
+    [0, 1, 0, 1, 2, 0, 1, 0, 1, 2, 0]
+    """
+    table = array("H", bytes(2 * (limit + 1)))
+    for total in range(limit + 1):
+        if table[total] == 0:
+            k = 1
+            while total + k * k <= limit:
+                table[total + k * k] = k
+                k += 1
+    return table
+
+
+class SubtractSquareDatabase:
+    """
+    Solved SubtractSquare positions for every total from 0 to limit.
+
+    limit - the largest total in the database
+    """
+    limit: int
+
+    def __init__(self, table: Any) -> None:
+        """
+        Create a database from table, as made by build_table.
+
+        >>> db = SubtractSquareDatabase(build_table(20))
+        >>> db.winning_move(18), db.winning_move(20)
+        (1, None)
+        """
+        self._table = table
+        self.limit = len(table) - 1
+        self._extra = array("H")
+
+    @classmethod
+    def build(cls, limit: int) -> 'SubtractSquareDatabase':
+        """
+        Return a database solved up to limit.
+        """
+        return cls(build_table(limit))
+
+    @classmethod
+    def load(cls, path: str) -> 'SubtractSquareDatabase':
+        """
+        Return the database saved at path, memory-mapping its table.
+        """
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, limit = HEADER.unpack_from(mapped)
+        if magic != MAGIC or len(mapped) != HEADER.size + 2 * (limit + 1):
+            raise ValueError("{} is not a SubtractSquare database!".format(
+                path))
+        if sys.byteorder == "little":
+            return cls(memoryview(mapped)[HEADER.size:].cast("H"))
+        table = array("H", mapped[HEADER.size:])
+        table.byteswap()
+        return cls(table)
+
+    def save(self, path: str) -> None:
+        """
+        Write this database to path.
+        """
+        table = array("H", self._table)
+        if sys.byteorder != "little":
+            table.byteswap()
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, self.limit))
+            f.write(table.tobytes())
+
+    def winning_move(self, total: int) -> Any:
+        """
+        Return the smallest square the player to move can subtract from
+        total and still win, or None if every move loses.
+
+        Totals above limit are solved on demand, in increasing order from
+        limit, and remembered for later calls.
+
+        >>> db = SubtractSquareDatabase(build_table(10))
+        >>> db.winning_move(9), db.winning_move(15), db.winning_move(18)
+        (4, None, 1)
+        """
+        for t in range(self.limit + 1 + len(self._extra), total + 1):
+            k = 1
+            while k * k <= t and self._root(t - k * k) != 0:
+                k += 1
+            self._extra.append(k if k * k <= t else 0)
+        k = self._root(total)
+        if k == 0:
+            return None
+        return k * k
+
+    def _root(self, total: int) -> int:
+        """
+        Return the stored entry for total, which must already be solved.
+        """
+        if total <= self.limit:
+            return self._table[total]
+        return self._extra[total - self.limit - 1]
+
+
+_DATABASES = {}
+
+
+def get_database(path: str = DEFAULT_PATH,
+                 limit: int = DEFAULT_LIMIT) -> SubtractSquareDatabase:
+    """
+    Return the database at path, building and saving it (up to limit) the
+    first time if the file does not exist yet.  Later calls for the same
+    path reuse it.
+    """
+    if path not in _DATABASES:
+        if not os.path.exists(path):
+            SubtractSquareDatabase.build(limit).save(path)
+        _DATABASES[path] = SubtractSquareDatabase.load(path)
+    return _DATABASES[path]
+
+
+def endgame_strategy(game: Any, database: SubtractSquareDatabase = None,
+                     fallback: Callable = minimax_recursive_strategy) -> Any:
+    """
+    Return the move minimax would choose for a game of SubtractSquare,
+    looked up in database (the one from get_database by default), or the
+    move of fallback for any other game.
+
+    Positions above the database's limit are solved on demand.
+    """
+    state = game.current_state
+    if not isinstance(state, SubtractSquareState):
+        return fallback(game)
+    if database is None:
+        database = get_database()
+    move = database.winning_move(state.current_total)
+    if move is None:
+        return 1
+    return move
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,80 @@
+"""
+Unittests for the SubtractSquare solved-position database.
+"""
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from game_interface import playable_games, usable_strategies
+from subtract_square_db import SubtractSquareDatabase, get_database
+minimax_recursive_strategy = usable_strategies['mr']
+endgame_strategy = usable_strategies['e']
+SubtractSquareGame = playable_games['s']
+StonehengeGame = playable_games['h']
+
+
+class SubtractSquareDatabaseUnitTests(unittest.TestCase):
+    def test_matches_minimax(self):
+        """
+        Test that the database picks minimax's move, both below its limit
+        and above it.
+        """
+        database = SubtractSquareDatabase.build(12)
+        for total in range(1, 31):
+            with patch('builtins.input', return_value=str(total)):
+                game = SubtractSquareGame(True)
+            self.assertEqual(endgame_strategy(game, database),
+                             minimax_recursive_strategy(game))
+
+    def test_save_and_load(self):
+        """
+        Test that a saved database loads back with the same answers.
+        """
+        database = SubtractSquareDatabase.build(2000)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "subtract_square.db")
+            database.save(path)
+            loaded = SubtractSquareDatabase.load(path)
+            self.assertEqual(loaded.limit, 2000)
+            for total in range(0, 3000, 7):
+                self.assertEqual(loaded.winning_move(total),
+                                 database.winning_move(total))
+
+    def test_load_rejects_other_files(self):
+        """
+        Test that loading a file that is not a database raises ValueError.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "other.db")
+            with open(path, "wb") as f:
+                f.write(b"not a database at all")
+            self.assertRaises(ValueError, SubtractSquareDatabase.load, path)
+
+    def test_other_games_fall_back(self):
+        """
+        Test that the strategy plays other games with minimax.
+        """
+        with patch('builtins.input', return_value='2'):
+            game = StonehengeGame(True)
+        game.current_state = game.current_state.make_move('A')
+        self.assertEqual(endgame_strategy(game),
+                         minimax_recursive_strategy(game))
+
+    def test_databases_cached_by_path(self):
+        """
+        Test that get_database loads each path once, and a database for
+        every path it is given.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            first = os.path.join(directory, "first.db")
+            second = os.path.join(directory, "second.db")
+            database = get_database(first, 10)
+            self.assertIs(get_database(first, 10), database)
+            other = get_database(second, 20)
+            self.assertIsNot(other, database)
+            self.assertEqual((database.limit, other.limit), (10, 20))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -47,6 +47,31 @@ class SubtractSquareState(GameState):
                                         self.current_total - move)
         return new_state
 
+    def apply_move(self, move: Any) -> Any:
+        """
+        Apply move to self in place and return the token for undo_move.
+
+        >>> s = SubtractSquareState(True, 10)
+        >>> token = s.apply_move(4)
+        >>> s == SubtractSquareState(True, 10).make_move(4)
+        True
+        >>> s.undo_move(token)
+        >>> s == SubtractSquareState(True, 10)
+        True
+        """
+        if type(move) == str:
+            move = int(move)
+        self.current_total -= move
+        self.p1_turn = not self.p1_turn
+        return move
+
+    def undo_move(self, token: Any) -> None:
+        """
+        Take back the move that apply_move returned token for.
+        """
+        self.current_total += token
+        self.p1_turn = not self.p1_turn
+
     def __repr__(self) -> str:
         """
         Return a representation of this state (which can be used for
@@ -55,6 +80,26 @@ class SubtractSquareState(GameState):
         return "P1's Turn: {} - Total: {}".format(self.p1_turn,
                                                   self.current_total)
 
+    def __eq__(self, other: Any) -> bool:
+        """
+        Return whether self and other have the same total and player to
+        move.
+
+        >>> SubtractSquareState(True, 5) == SubtractSquareState(True, 5)
+        True
+        >>> SubtractSquareState(True, 5) == SubtractSquareState(False, 5)
+        False
+        """
+        return (type(self) == type(other)
+                and self.current_total == other.current_total
+                and self.p1_turn == other.p1_turn)
+
+    def __hash__(self) -> int:
+        """
+        Return a hash of self, consistent with __eq__.
+        """
+        return self.current_total * 2 + self.p1_turn
+
     def rough_outcome(self) -> float:
         """
         Return an estimate in interval [LOSE, WIN] of best outcome the current
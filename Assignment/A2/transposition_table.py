@@ -0,0 +1,160 @@
+"""
+A transposition table for minimax strategies.
+"""
+from collections import OrderedDict
+from typing import Any, Callable
+
+
+def state_key(state: Any) -> Any:
+    """
+    Return state itself if its class defines __eq__ and __hash__, so it can
+    be a dict key directly, and repr(state) otherwise.
+
+    >>> state_key("a"), state_key([1])
+    ('a', '[1]')
+    """
+    cls = type(state)
+    if cls.__eq__ is not object.__eq__ and cls.__hash__ is not None:
+        return state
+    return repr(state)
+
+
+def canonical_key(state: Any) -> Any:
+    """
+    Return a key shared by state and the positions symmetric to it, if its
+    game has a canonical_key method, and state_key(state) otherwise.  Pass
+    it as the key of a TranspositionTable to share entries between such
+    positions.
+    """
+    if hasattr(state, "canonical_key"):
+        return state.canonical_key()
+    return state_key(state)
+
+
+class TranspositionTable:
+    """
+    A bounded cache of minimax scores, keyed by game state.
+
+    capacity - the largest number of entries kept at once
+    policy - 'lru' evicts the least recently used entry, 'depth' evicts the
+             entry that was stored deepest in the search tree (the cheapest
+             one to recompute)
+    key - a function mapping a GameState to its canonical, hashable key;
+          by default the state itself where it can be hashed (see
+          state_key)
+    hits - the number of lookups that found an entry
+    misses - the number of lookups that did not
+    """
+    capacity: int
+    policy: str
+    key: Callable[[Any], Any]
+    hits: int
+    misses: int
+
+    def __init__(self, capacity: int = 100000, policy: str = "lru",
+                 key: Callable[[Any], Any] = state_key) -> None:
+        """
+        Create a new, empty TranspositionTable self.
+
+        >>> t = TranspositionTable(2)
+        >>> t.put("a", 1)
+        >>> t.get("a"), t.get("b")
+        (1, None)
+        >>> t.hits, t.misses
+        (1, 1)
+        """
+        if policy not in ["lru", "depth"]:
+            raise ValueError("Unknown eviction policy {}!".format(policy))
+        self.capacity = capacity
+        self.policy = policy
+        self.key = key
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._by_depth = {}
+
+    def __len__(self) -> int:
+        """
+        Return the number of entries in self.
+        """
+        return len(self._entries)
+
+    def get(self, state: Any) -> Any:
+        """
+        Return the score stored for state, or None if there is none.
+        """
+        k = self.key(state)
+        entry = self._entries.get(k)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        if self.policy == "lru":
+            self._entries.move_to_end(k)
+        return entry[0]
+
+    def put(self, state: Any, score: int, depth: int = 0) -> None:
+        """
+        Store score for state, which was found depth plies below the root
+        of the search, evicting an entry if self is full.  Under the 'depth'
+        policy a full table keeps its entries instead if none of them is
+        shallower than the new one.
+
+        >>> t = TranspositionTable(2, "depth")
+        >>> t.put("a", 1, 0)
+        >>> t.put("b", -1, 5)
+        >>> t.put("c", 0, 1)
+        >>> t.put("d", 0, 7)
+        >>> t.get("b") is None, t.get("d") is None, t.get("a"), t.get("c")
+        (True, True, 1, 0)
+        """
+        k = self.key(state)
+        if k in self._entries:
+            self._discard(k)
+        elif len(self._entries) >= self.capacity:
+            if (self.policy == "depth" and self._by_depth
+                    and depth >= max(self._by_depth)):
+                return
+            self._evict()
+        if len(self._entries) < self.capacity:
+            self._entries[k] = (score, depth)
+            if self.policy == "depth":
+                self._by_depth.setdefault(depth, OrderedDict())[k] = None
+
+    def clear(self) -> None:
+        """
+        Remove every entry from self and reset the hit and miss counters.
+        """
+        self._entries.clear()
+        self._by_depth.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def _discard(self, k: Any) -> None:
+        """
+        Remove the entry with key k from self.
+        """
+        _, depth = self._entries.pop(k)
+        if self.policy == "depth":
+            bucket = self._by_depth[depth]
+            del bucket[k]
+            if not bucket:
+                del self._by_depth[depth]
+
+    def _evict(self) -> None:
+        """
+        Remove one entry from self according to self.policy.
+        """
+        if not self._entries:
+            return
+        if self.policy == "lru":
+            self._entries.popitem(last=False)
+        else:
+            self._discard(next(iter(self._by_depth[max(self._by_depth)])))
+
+
+if __name__ == "__main__":
+    from python_ta import check_all
+    check_all(config="a2_pyta.txt")
+    import doctest
+    doctest.testmod()